@@ -1,20 +1,106 @@
-from flask import Flask, render_template
+from flask import Flask, Response, abort, render_template, request
+from collections import OrderedDict
+import gzip
+import hashlib
 import json
+import threading
+from calendar_store import DEFAULT_STORE_PATH, CalendarStore
 
 app = Flask(__name__)
 
-# Sample data (you could replace this with your own data processing logic)
-data = [
-    {"name": "Category A", "value": 30},
-    {"name": "Category B", "value": 80},
-    {"name": "Category C", "value": 45},
-    {"name": "Category D", "value": 60},
-]
+# Calendars written by dvv.py and bulk_calendar.py
+store = CalendarStore(DEFAULT_STORE_PATH)
+
+# Page sizes for /api/calendar
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_BYTES = 1024
+# Serialised responses kept per store version, so repeated queries skip the database and json.dumps
+RESPONSE_CACHE_ENTRIES = 256
+
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+
+# Function to serve a JSON payload with an ETag, conditional GET and gzip
+def cached_json(build_payload):
+    """Returns a JSON response for the current request, built at most once per store version.
+
+    The ETag is derived from the store version and the query, so an unchanged calendar answers
+    If-None-Match with a 304 before any query runs.
+    """
+    version = store.version()
+    key = (version, request.path, tuple(sorted(request.args.items(multi=True))))
+    etag = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+    use_gzip = "gzip" in request.accept_encodings
+    # The compressed variant is a different representation, so it gets its own tag
+    variant_etag = f"{etag}-gz" if use_gzip else etag
+    if request.if_none_match.contains(variant_etag) or request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(variant_etag)
+        return response
+
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if entry is not None:
+            _response_cache.move_to_end(key)
+    if entry is None:
+        body = json.dumps(build_payload(), separators=(",", ":")).encode()
+        compressed = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+        entry = (body, compressed)
+        with _response_cache_lock:
+            _response_cache[key] = entry
+            while len(_response_cache) > RESPONSE_CACHE_ENTRIES:
+                _response_cache.popitem(last=False)
+
+    body, compressed = entry
+    response = Response(compressed if use_gzip and compressed else body, mimetype="application/json")
+    if use_gzip and compressed:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"  # Clients may keep it but must revalidate with the ETag
+    response.set_etag(variant_etag)
+    return response
+
 
 @app.route("/")
 def index():
-    # Pass data to the template
-    return render_template("index.html", data=json.dumps(data))
+    # Pass the category distribution of everything scheduled to the template
+    return render_template("index.html", data=json.dumps(store.category_counts()))
+
+
+@app.route("/api/calendar")
+def calendar_items():
+    # Query string: start, end (ISO dates), topic, platform, limit and cursor (from the previous page)
+    limit = min(max(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    cursor = request.args.get("cursor")
+    after = None
+    if cursor:
+        date, _, item_id = cursor.partition("_")
+        if not item_id.isdigit():
+            abort(400, "Invalid cursor.")
+        after = (date, int(item_id))
+
+    def build_payload():
+        try:
+            items = store.query(
+                request.args.get("start"), request.args.get("end"), request.args.get("topic"),
+                request.args.get("platform"), after, limit + 1,
+            )
+        except ValueError:
+            abort(400, "Dates must be YYYY-MM-DD.")
+        # One extra row tells whether another page exists without a COUNT query
+        next_cursor = f"{items[limit - 1]['date']}_{items[limit - 1]['id']}" if len(items) > limit else None
+        return {"items": items[:limit], "next_cursor": next_cursor}
+
+    return cached_json(build_payload)
+
+
+@app.route("/api/topics")
+def topics():
+    return cached_json(lambda: {"topics": store.topics()})
+
 
 if __name__ == "__main__":
     app.run(debug=True)
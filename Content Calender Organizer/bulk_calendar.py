@@ -0,0 +1,230 @@
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from calendar_store import DEFAULT_STORE_PATH, CalendarStore
+from calendar_schema import (
+    CALENDAR_DAYS, CATEGORIES, IDEAS_PER_CATEGORY, TOPIC_CALENDAR_SCHEMA, fill_calendar, missing_categories,
+    parse_topic_calendars, topics_prompt
+)
+
+# Output tokens the model may spend on one packed prompt (the model allows 8192; the rest is headroom)
+OUTPUT_TOKEN_BUDGET = 6000
+# Estimated output tokens per idea record (JSON keys, date, platform and a one-sentence title)
+TOKENS_PER_IDEA = 45
+# Never pack more topics than this into one prompt, so one bad answer can't take out a whole quarter
+MAX_TOPICS_PER_PROMPT = 8
+# Follow-up rounds that re-request only the categories still missing
+MAX_RETRY_ROUNDS = 2
+# Default request rate against the API
+REQUESTS_PER_MINUTE = 15
+
+
+class RateLimiter:
+    """Spaces call starts at least 60 / requests_per_minute seconds apart across threads."""
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(max(0.0, start - now))
+
+
+# Function to read topics and their date ranges
+def read_topics(path, default_days=CALENDAR_DAYS):
+    """Reads a CSV with a `topic` column and optional `start_date`/`end_date`, or a plain list of topics.
+
+    Missing dates default to a `default_days` range starting today. Returns (topic, start, end) tuples.
+    """
+    today = datetime.date.today()
+    with open(path, newline="") as file:
+        first = file.readline()
+        file.seek(0)
+        if "topic" in [column.strip().lower() for column in first.split(",")]:
+            rows = [{key.strip().lower(): (value or "").strip() for key, value in row.items()} for row in csv.DictReader(file)]
+        else:
+            rows = [{"topic": line.strip()} for line in file if line.strip() and not line.startswith("#")]
+
+    topics = []
+    for row in rows:
+        if not row.get("topic"):
+            continue
+        start = datetime.date.fromisoformat(row["start_date"]) if row.get("start_date") else today
+        end = datetime.date.fromisoformat(row["end_date"]) if row.get("end_date") else start + datetime.timedelta(days=default_days - 1)
+        topics.append((row["topic"], start, end))
+    return topics
+
+
+# Function to pack topic requests into prompts that fit the output budget
+def pack_requests(requests, token_budget=OUTPUT_TOKEN_BUDGET, max_topics=MAX_TOPICS_PER_PROMPT):
+    """Greedily groups (topic, start, end, counts) requests so each group's estimated answer fits the budget."""
+    batches, batch, tokens = [], [], 0
+    for request in requests:
+        cost = sum(request[3].values()) * TOKENS_PER_IDEA
+        if batch and (tokens + cost > token_budget or len(batch) == max_topics):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(request)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# Function to run one packed prompt
+def run_prompt(model, batch, limiter):
+    """Returns ({topic: [ContentIdea]}, rejected, error) for one packed prompt."""
+    limiter.wait()
+    try:
+        response = model.generate_content(topics_prompt(batch))
+        calendars, rejected = parse_topic_calendars(response.text, batch)
+        return calendars, rejected, None
+    except Exception as e:
+        return {}, [], str(e)
+
+
+# Function to generate calendars for every topic
+def run_bulk(model, topics, concurrency=4, requests_per_minute=REQUESTS_PER_MINUTE, token_budget=OUTPUT_TOKEN_BUDGET):
+    """Generates a calendar per (topic, start, end), packing topics into prompts and retrying only what's missing.
+
+    Returns (calendars, counts) where calendars maps topic to its ContentIdea list.
+    """
+    limiter = RateLimiter(requests_per_minute)
+    calendars = {topic: [] for topic, _, _ in topics}
+    ranges = {topic: (start, end) for topic, start, end in topics}
+    counts = {"topics": len(calendars), "calls": 0, "rejected": 0, "errors": 0, "incomplete": 0}
+    start_time = time.perf_counter()
+
+    pending = [(topic, start, end, {category: IDEAS_PER_CATEGORY for category in CATEGORIES}) for topic, start, end in topics]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for round_number in range(1 + MAX_RETRY_ROUNDS):
+            batches = pack_requests(pending, token_budget)
+            counts["calls"] += len(batches)
+            for batch_calendars, rejected, error in pool.map(lambda batch: run_prompt(model, batch, limiter), batches):
+                counts["rejected"] += len(rejected)
+                if error:
+                    counts["errors"] += 1
+                    print("Batch failed:", error, file=sys.stderr)
+                for topic, ideas in batch_calendars.items():
+                    calendars[topic] = fill_calendar(calendars[topic], ideas)
+
+            pending = [
+                (topic, *ranges[topic], missing)
+                for topic in calendars
+                for missing in [missing_categories(calendars[topic])]
+                if missing
+            ]
+            if not pending:
+                break
+            print(f"Round {round_number + 1}: {len(pending)} topics still short", file=sys.stderr)
+
+    counts["incomplete"] = len(pending)
+    counts["seconds"] = round(time.perf_counter() - start_time, 2)
+    return calendars, counts
+
+
+# Function to flatten calendars into date-ordered rows
+def calendar_rows(calendars):
+    rows = [
+        {"date": idea.date.isoformat(), "topic": topic, "platform": idea.platform, "category": idea.category, "title": idea.title}
+        for topic, ideas in calendars.items()
+        for idea in ideas
+    ]
+    return sorted(rows, key=lambda row: (row["date"], row["topic"], row["category"]))
+
+
+# Function to escape text for an iCalendar property
+def _ics_text(value):
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+# Function to write the merged calendar
+def write_calendar(rows, output_path):
+    """Writes rows as CSV, iCalendar (.ics) or JSON, chosen by the file extension."""
+    extension = os.path.splitext(output_path)[1].lower()
+    with open(output_path, "w", newline="") as file:
+        if extension == ".csv":
+            writer = csv.DictWriter(file, fieldnames=["date", "topic", "platform", "category", "title"])
+            writer.writeheader()
+            writer.writerows(rows)
+        elif extension == ".ics":
+            stamp = datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//AI Tools//Content Calendar//EN"]
+            for i, row in enumerate(rows):
+                day = datetime.date.fromisoformat(row["date"])
+                lines += [
+                    "BEGIN:VEVENT",
+                    f"UID:{day:%Y%m%d}-{i}@content-calendar",
+                    f"DTSTAMP:{stamp}",
+                    f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+                    f"DTEND;VALUE=DATE:{day + datetime.timedelta(days=1):%Y%m%d}",
+                    f"SUMMARY:{_ics_text(row['title'])}",
+                    f"CATEGORIES:{_ics_text(row['category'])}",
+                    f"DESCRIPTION:{_ics_text(row['topic'] + ' - ' + row['platform'])}",
+                    "END:VEVENT",
+                ]
+            lines.append("END:VCALENDAR")
+            file.write("\r\n".join(lines) + "\r\n")
+        else:
+            json.dump(rows, file, indent=2)
+
+
+# Command-line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate content calendars for many topics at once.")
+    parser.add_argument("topics", help="CSV with topic[,start_date,end_date] columns, or a text file with one topic per line")
+    parser.add_argument("--output", default="calendar.csv", help="Merged calendar file: .csv, .ics or .json")
+    parser.add_argument("--concurrency", type=int, default=4, help="Prompts in flight at once")
+    parser.add_argument("--rpm", type=float, default=REQUESTS_PER_MINUTE, help="Maximum requests per minute")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="SQLite calendar store the dashboard reads")
+    parser.add_argument("--no-store", action="store_true", help="Only write --output, not the calendar store")
+    parser.add_argument("--token-budget", type=int, default=OUTPUT_TOKEN_BUDGET, help="Estimated output tokens per packed prompt")
+    args = parser.parse_args(argv)
+
+    import google.generativeai as genai
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise ValueError("Gemini API key not found. Please set GEMINI_API_KEY in your .env file.")
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(
+        model_name="gemini-1.5-flash",
+        generation_config={
+            "temperature": 0.7,
+            "max_output_tokens": 8192,
+            "response_mime_type": "application/json",
+            "response_schema": TOPIC_CALENDAR_SCHEMA,
+        }
+    )
+
+    topics = read_topics(args.topics)
+    calendars, counts = run_bulk(model, topics, args.concurrency, args.rpm, args.token_budget)
+    rows = calendar_rows(calendars)
+    write_calendar(rows, args.output)
+    if not args.no_store:
+        store = CalendarStore(args.store)
+        for topic, ideas in calendars.items():
+            store.add_ideas(topic, ideas)
+    print(
+        f"{len(rows)} ideas for {counts['topics']} topics in {counts['seconds']}s using {counts['calls']} calls "
+        f"(one call per topic would take {counts['topics']}); {counts['rejected']} records rejected, "
+        f"{counts['errors']} failed calls, {counts['incomplete']} topics incomplete -> {args.output}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import copy
+import datetime
+import json
+import re
+from collections import namedtuple
+
+# Categories every calendar covers, and how many ideas each one needs
+CATEGORIES = ("Introduction", "Benefits", "How-to", "Inspiration", "FAQs")
+IDEAS_PER_CATEGORY = 2
+# Ideas are scheduled over this many days from the start date
+CALENDAR_DAYS = 14
+
+# JSON schema passed to the model as response_schema, so it can only answer with calendar records
+CALENDAR_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ideas": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "date": {"type": "string", "description": "Publication date, YYYY-MM-DD"},
+                    "platform": {"type": "string", "description": "Blog, Instagram, YouTube, LinkedIn, ..."},
+                    "category": {"type": "string", "description": "One of: " + ", ".join(CATEGORIES)},
+                    "title": {"type": "string", "description": "The content idea, one sentence"},
+                },
+                "required": ["date", "platform", "category", "title"],
+            },
+        }
+    },
+    "required": ["ideas"],
+}
+
+# Schema for prompts that pack several topics: each record also names its topic
+TOPIC_CALENDAR_SCHEMA = copy.deepcopy(CALENDAR_SCHEMA)
+TOPIC_CALENDAR_SCHEMA["properties"]["ideas"]["items"]["properties"]["topic"] = {
+    "type": "string", "description": "The topic this idea belongs to, exactly as given"
+}
+TOPIC_CALENDAR_SCHEMA["properties"]["ideas"]["items"]["required"].append("topic")
+
+ContentIdea = namedtuple("ContentIdea", ["date", "platform", "category", "title"])
+
+# Spellings the model uses for each category, reduced to lower-case letters only
+_CATEGORY_KEYS = {re.sub(r"[^a-z]", "", category.lower()): category for category in CATEGORIES}
+_CATEGORY_KEYS.update({"intro": "Introduction", "benefit": "Benefits", "howtos": "How-to", "faq": "FAQs", "inspirations": "Inspiration"})
+
+
+# Function to map a category label onto one of CATEGORIES
+def normalize_category(label):
+    """Returns the canonical category for labels like "How to", "how-to" or "FAQ", or None."""
+    return _CATEGORY_KEYS.get(re.sub(r"[^a-z]", "", str(label).lower()))
+
+
+# Function to build the calendar prompt
+def calendar_prompt(topic, counts, start_date=None):
+    """Asks for `counts[category]` ideas per category, scheduled from `start_date` (default today)."""
+    start_date = start_date or datetime.date.today()
+    end_date = start_date + datetime.timedelta(days=CALENDAR_DAYS - 1)
+    wanted = "\n".join(f"    - {category}: {count}" for category, count in counts.items())
+    return f"""
+    Create a content calendar for the topic: '{topic}'.
+    Schedule the ideas between {start_date.isoformat()} and {end_date.isoformat()}, spread across different days and platforms.
+    Provide exactly this many ideas per category:
+{wanted}
+    Each idea's title should be one creative sentence, and its category must be one of: {", ".join(counts)}.
+    """
+
+
+# Function to validate one calendar record
+def _parse_idea(item):
+    """Returns (ContentIdea, None) for a valid record, or (None, reason)."""
+    if not isinstance(item, dict):
+        return None, "not an object"
+    category = normalize_category(item.get("category", ""))
+    title = str(item.get("title", "")).strip()
+    platform = str(item.get("platform", "")).strip()
+    try:
+        date = datetime.date.fromisoformat(str(item.get("date", "")).strip())
+    except ValueError:
+        date = None
+    if category is None:
+        return None, "unknown category"
+    if not title:
+        return None, "missing title"
+    if date is None:
+        return None, "invalid date"
+    return ContentIdea(date, platform or "Blog", category, title), None
+
+
+# Function to read the list of records out of a response
+def _response_items(text):
+    """Returns (items, error) for a {"ideas": [...]} response."""
+    try:
+        items = json.loads(text).get("ideas", [])
+    except (ValueError, AttributeError) as e:
+        return None, f"invalid JSON: {e}"
+    if not isinstance(items, list):
+        return None, "'ideas' is not a list"
+    return items, None
+
+
+# Function to parse and validate a structured calendar response in one pass
+def parse_calendar(text):
+    """Returns (ideas, rejected): valid ContentIdea records and (item, reason) pairs for everything else."""
+    items, error = _response_items(text)
+    if error:
+        return [], [(text, error)]
+
+    ideas, rejected = [], []
+    for item in items:
+        idea, reason = _parse_idea(item)
+        if idea is None:
+            rejected.append((item, reason))
+        else:
+            ideas.append(idea)
+    return ideas, rejected
+
+
+# Function to build a prompt covering several topics at once
+def topics_prompt(requests):
+    """`requests` is a list of (topic, start_date, end_date, counts); counts maps category to ideas wanted."""
+    sections = "\n".join(
+        f"    - '{topic}', scheduled between {start.isoformat()} and {end.isoformat()}: "
+        + ", ".join(f"{category}: {count}" for category, count in counts.items())
+        for topic, start, end, counts in requests
+    )
+    return f"""
+    Create content calendars for each of the following topics.
+    For each topic, provide exactly the listed number of ideas per category, on dates inside its range,
+    spread across different days and platforms:
+{sections}
+    Each idea's title should be one creative sentence, and its topic must be copied exactly as given.
+    """
+
+
+# Function to parse a multi-topic response, routing each record to its topic
+def parse_topic_calendars(text, requests):
+    """Returns ({topic: [ContentIdea]}, rejected) for a response to topics_prompt(requests).
+
+    Records naming an unknown topic, or dated outside their topic's range, are rejected.
+    """
+    ranges = {" ".join(topic.split()).casefold(): (topic, start, end) for topic, start, end, _ in requests}
+    calendars = {topic: [] for topic, _, _, _ in requests}
+    items, error = _response_items(text)
+    if error:
+        return calendars, [(text, error)]
+
+    rejected = []
+    for item in items:
+        idea, reason = _parse_idea(item)
+        known = ranges.get(" ".join(str(item.get("topic", "")).split()).casefold()) if idea else None
+        if idea is None:
+            rejected.append((item, reason))
+        elif known is None:
+            rejected.append((item, "unknown topic"))
+        elif not known[1] <= idea.date <= known[2]:
+            rejected.append((item, "date outside the topic's range"))
+        else:
+            calendars[known[0]].append(idea)
+    return calendars, rejected
+
+
+# Function to count the ideas each category still needs
+def missing_categories(ideas, per_category=IDEAS_PER_CATEGORY):
+    """Returns {category: ideas still needed}, leaving out categories that are already full."""
+    have = {category: 0 for category in CATEGORIES}
+    for idea in ideas:
+        have[idea.category] += 1
+    return {category: per_category - count for category, count in have.items() if count < per_category}
+
+
+# Function to merge a retry's ideas into a calendar
+def fill_calendar(ideas, new_ideas, per_category=IDEAS_PER_CATEGORY):
+    """Adds new ideas only to categories that are still short, skipping titles the calendar already has."""
+    needed = missing_categories(ideas, per_category)
+    titles = {idea.title.casefold() for idea in ideas}
+    merged = list(ideas)
+    for idea in new_ideas:
+        if needed.get(idea.category, 0) > 0 and idea.title.casefold() not in titles:
+            merged.append(idea)
+            titles.add(idea.title.casefold())
+            needed[idea.category] -= 1
+    return merged
@@ -0,0 +1,124 @@
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+# Shared by the generators and the Flask app, so every calendar generated anywhere shows up in the dashboard
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calendar.sqlite3")
+
+
+# Function to normalise a topic into a lookup key
+def normalize_topic(topic):
+    """Lower-cases a topic and collapses whitespace."""
+    return " ".join(topic.split()).casefold()
+
+
+class CalendarStore:
+    """SQLite store of scheduled content ideas, indexed for date-range, topic and platform queries.
+
+    A version number is bumped in the same transaction as every write that changes the data, so readers
+    (e.g. the Flask app's ETags) can tell whether anything changed without scanning the table.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.executescript(
+                """
+                PRAGMA journal_mode = WAL;
+                CREATE TABLE IF NOT EXISTS calendar_items (
+                    id INTEGER PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    topic_key TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    UNIQUE (topic_key, date, title)
+                );
+                CREATE INDEX IF NOT EXISTS calendar_items_date ON calendar_items (date, id);
+                CREATE INDEX IF NOT EXISTS calendar_items_topic ON calendar_items (topic_key, date, id);
+                CREATE INDEX IF NOT EXISTS calendar_items_platform ON calendar_items (platform, date, id);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+                """
+            )
+
+    def add_ideas(self, topic, ideas):
+        """Stores ContentIdea records for a topic, skipping ones it already has; returns how many were new."""
+        now = time.time()
+        rows = [
+            (topic, normalize_topic(topic), idea.date.isoformat(), idea.platform, idea.category, idea.title, now)
+            for idea in ideas
+        ]
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO calendar_items (topic, topic_key, date, platform, category, title, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = self._db.total_changes - before
+            if added:
+                self._db.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return added
+
+    def version(self):
+        """Returns a number that changes whenever the stored calendar does."""
+        with self._lock:
+            return self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def query(self, start=None, end=None, topic=None, platform=None, after=None, limit=100):
+        """Returns up to `limit` items ordered by (date, id), as dicts.
+
+        `start`/`end` are inclusive ISO dates. Pagination is keyset-based: pass the (date, id) of the last
+        item of a page as `after` to get the next one, which stays fast however deep the page is.
+        """
+        clauses, params = [], []
+        if start:
+            clauses.append("date >= ?")
+            params.append(datetime.date.fromisoformat(start).isoformat())
+        if end:
+            clauses.append("date <= ?")
+            params.append(datetime.date.fromisoformat(end).isoformat())
+        if topic:
+            clauses.append("topic_key = ?")
+            params.append(normalize_topic(topic))
+        if platform:
+            clauses.append("platform = ?")
+            params.append(platform)
+        if after:
+            clauses.append("(date, id) > (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, date, topic, platform, category, title FROM calendar_items {where} "
+                "ORDER BY date, id LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def topics(self):
+        """Returns every topic with its item count and date range."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT MIN(topic) AS topic, COUNT(*) AS items, MIN(date) AS first_date, MAX(date) AS last_date "
+                "FROM calendar_items GROUP BY topic_key ORDER BY topic_key"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def category_counts(self):
+        """Returns [{"name": category, "value": count}] across the whole calendar."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT category AS name, COUNT(*) AS value FROM calendar_items GROUP BY category ORDER BY category"
+            ).fetchall()
+        return [dict(row) for row in rows]
@@ -1,8 +1,18 @@
+import html
 import os
+import sys
 import gradio as gr
 import google.generativeai as genai
 from dotenv import load_dotenv
 import plotly.graph_objects as go
+from calendar_store import CalendarStore
+from calendar_schema import (
+    CATEGORIES, CALENDAR_SCHEMA, IDEAS_PER_CATEGORY, calendar_prompt, fill_calendar, missing_categories, parse_calendar
+)
+
+# Live inputs go through the shared debounce/coalesce layer
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from live_input import LIVE_CONCURRENCY, SUPERSEDED, LiveInput  # noqa: E402
 
 # Load environment variables from .env file (where your GEMINI_API_KEY should be stored)
 load_dotenv()
@@ -16,41 +26,52 @@ if not api_key:
 # Configure the Google Generative AI API with the provided API key
 genai.configure(api_key=api_key)
 
-# Function to generate content ideas using Google Generative AI API with prompt engineering
+# Structured model: the response schema makes it answer with typed calendar records instead of free text
+calendar_model = genai.GenerativeModel(
+    model_name="gemini-1.5-flash",
+    generation_config={
+        "temperature": 0.7,
+        "top_p": 1.0,
+        "max_output_tokens": 2048,
+        "response_mime_type": "application/json",
+        "response_schema": CALENDAR_SCHEMA,
+    }
+)
+
+# Generated calendars are kept for the Flask dashboard (app.py)
+calendar_store = CalendarStore()
+
+# How many follow-up requests may fill in categories the first answer left short
+MAX_CALENDAR_RETRIES = 2
+
+# Function to generate a structured content calendar, retrying only the categories that came back short
 def generate_content_ideas(topic):
-    # Prompt engineering for better categorization of content ideas
-    prompt = f"""
-    Generate a list of 10 creative content ideas for the topic: '{topic}'.
-    Organize the ideas into categories: 'Introduction', 'Benefits', 'How-to', 'Inspiration', and 'FAQs'. 
-    Each idea should be one sentence and belong to one of the categories. 
-    The response should be in the following format:
-    - Introduction: "Content idea here"
-    - Benefits: "Content idea here"
-    - How-to: "Content idea here"
-    - Inspiration: "Content idea here"
-    - FAQs: "Content idea here"
-    Please ensure there are at least 2 ideas in each category.
-    """
+    ideas = []
+    missing = {category: IDEAS_PER_CATEGORY for category in CATEGORIES}
     
     try:
-        # Request the AI to generate content ideas based on the engineered prompt using the correct method 'generate()'
-        response = genai.GenerativeModel.generate(model_name="gemini-1.0-pro", prompt=prompt)
-        content_ideas = response.text.strip().split('\n')
-
-        # Clean the content ideas, extracting just the text after the category
-        structured_ideas = {category: [] for category in ['Introduction', 'Benefits', 'How to', 'Inspiration', 'FAQs']}
-        
-        for idea in content_ideas:
-            for category in structured_ideas.keys():
-                if category.lower() in idea.lower():
-                    # Extract the content idea by splitting after the colon
-                    content_text = idea.split(':')[1].strip()
-                    structured_ideas[category].append(content_text)
-                    break
-        
-        return structured_ideas
+        for attempt in range(1 + MAX_CALENDAR_RETRIES):
+            response = calendar_model.generate_content(calendar_prompt(topic, missing))
+            new_ideas, rejected = parse_calendar(response.text)
+            if rejected:
+                print(f"Rejected {len(rejected)} calendar entries:", rejected)  # Debugging output
+            ideas = fill_calendar(ideas, new_ideas)
+            missing = missing_categories(ideas)
+            if not missing:
+                break
+            print(f"Attempt {attempt + 1} left categories short, retrying only those:", missing)
     except Exception as e:
-        return f"Error generating content ideas: {str(e)}"
+        if not ideas:
+            return f"Error generating content ideas: {str(e)}"
+        print("Keeping a partial calendar after an error:", e)
+    
+    calendar_store.add_ideas(topic, ideas)
+
+    # Group the records by category, in calendar order
+    structured_ideas = {category: [] for category in CATEGORIES}
+    for idea in sorted(ideas, key=lambda idea: idea.date):
+        structured_ideas[idea.category].append(idea)
+    return structured_ideas
 
 # Create a function to generate a bar chart using Plotly
 def generate_visualization(content_ideas):
@@ -73,15 +94,36 @@ def generate_visualization(content_ideas):
     # Return Plotly chart in HTML format for Gradio to display
     return fig.to_html(full_html=False)
 
-# Set up Gradio interface for user interaction
-def gradio_interface(topic):
+# Function to render the calendar records as an HTML table
+def generate_calendar_table(content_ideas):
+    ideas = sorted((idea for ideas in content_ideas.values() for idea in ideas), key=lambda idea: idea.date)
+    rows = "".join(
+        f"<tr><td>{idea.date:%a %d %b}</td><td>{html.escape(idea.platform)}</td>"
+        f"<td>{idea.category}</td><td>{html.escape(idea.title)}</td></tr>"
+        for idea in ideas
+    )
+    return f"<table><tr><th>Date</th><th>Platform</th><th>Category</th><th>Idea</th></tr>{rows}</table>"
+
+# Function to generate the ideas chart for a topic
+def generate_ideas_chart(topic):
     content_ideas = generate_content_ideas(topic)
     
     if isinstance(content_ideas, str):  # In case of an error generating content ideas
         return content_ideas
     
     chart_html = generate_visualization(content_ideas)
-    return chart_html
+    return chart_html + generate_calendar_table(content_ideas)
+
+# Debounces keystrokes and reuses identical generations across the live interface
+live_input = LiveInput()
+
+# Set up Gradio interface for user interaction
+def gradio_interface(topic, request: gr.Request):
+    result = live_input.submit(request.session_hash, (topic,), generate_ideas_chart)
+    if result is SUPERSEDED:
+        return gr.update()  # A newer keystroke is on its way; keep the current output
+    print("Live input:", live_input.stats(request.session_hash))  # Calls saved this session
+    return result
 
 # Create a simple Gradio interface with visualization
 iface = gr.Interface(
@@ -91,6 +133,7 @@ iface = gr.Interface(
     ],
     outputs="html",  # The generated output will be an HTML (Plotly chart)
     live=True,
+    concurrency_limit=LIVE_CONCURRENCY,
     title="AI-Powered Content Ideas Visualization with Prompt Engineering",
     description="Provide a topic to generate content ideas, categorize them, and visualize their distribution across different categories."
 )
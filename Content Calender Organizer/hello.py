@@ -1,8 +1,13 @@
 import os
+import sys
 import gradio as gr
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+# Live inputs go through the shared debounce/coalesce layer
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from live_input import LIVE_CONCURRENCY, SUPERSEDED, LiveInput  # noqa: E402
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -50,9 +55,16 @@ def generate_content_calendar(topic):
     except Exception as e:
         return f"Error generating content calendar: {str(e)}"
 
+# Debounces keystrokes and reuses identical generations across the live interface
+live_input = LiveInput()
+
 # Set up Gradio interface for user interaction
-def gradio_interface(topic):
-    return generate_content_calendar(topic)
+def gradio_interface(topic, request: gr.Request):
+    result = live_input.submit(request.session_hash, (topic,), generate_content_calendar)
+    if result is SUPERSEDED:
+        return gr.update()  # A newer keystroke is on its way; keep the current output
+    print("Live input:", live_input.stats(request.session_hash))  # Calls saved this session
+    return result
 
 # Create a simple Gradio interface
 iface = gr.Interface(
@@ -62,6 +74,7 @@ iface = gr.Interface(
     ],
     outputs="text",  # The generated response will be text
     live=True,
+    concurrency_limit=LIVE_CONCURRENCY,
     title="AI-Powered Content Calendar Generator",
     description="Provide a topic for your content calendar, and receive personalized content ideas for your posts."
 )
@@ -0,0 +1,147 @@
+import difflib
+import re
+import sqlite3
+import threading
+from collections import deque
+
+# Common abbreviations expanded before lookup, so "ML" and "machine learning" share an entry
+ALIASES = {
+    "ai": "artificial intelligence",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "nlp": "natural language processing",
+    "cv": "computer vision",
+    "rl": "reinforcement learning",
+    "llm": "large language model",
+    "iot": "internet of things",
+    "ui": "user interface",
+    "ux": "user experience",
+    "seo": "search engine optimization",
+    "db": "database",
+}
+# Minimum similarity (0-1) for a fuzzy keyword match
+FUZZY_CUTOFF = 0.88
+# A stored subgraph is served instead of calling the model once it has at least this many concepts,
+# at least MIN_DIRECT_RELATIONS of them linked straight to the keyword (so a concept that only
+# appeared as a leaf of some other map doesn't count as covered)
+MIN_COVERAGE_NODES = 6
+MIN_DIRECT_RELATIONS = 4
+# Stored subgraphs are cut off at this many concepts, about the size of a generated map
+MAX_SERVED_NODES = 15
+
+
+# Function to normalise a concept name into an index key
+def normalize_concept(name):
+    """Lower-cases, strips punctuation, expands known abbreviations and drops a plural 's'."""
+    key = " ".join(re.sub(r"[^\w\s+#]", " ", name.lower()).split())
+    key = ALIASES.get(key, key)
+    words = key.split(" ")
+    last = words[-1]
+    if len(last) > 3 and last.endswith("s") and not last.endswith(("ss", "us", "is")):
+        words[-1] = last[:-1]
+    return " ".join(words)
+
+
+class ConceptIndex:
+    """Knowledge graph of every concept map parsed so far, used to answer known keywords without the model."""
+
+    def __init__(self, path="concept_maps.sqlite3"):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS concepts (
+                    key TEXT PRIMARY KEY,
+                    name TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS relations (
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    PRIMARY KEY (source, target)
+                );
+                CREATE INDEX IF NOT EXISTS relations_target ON relations (target);
+                """
+            )
+        self._keys = [row[0] for row in self._db.execute("SELECT key FROM concepts")]
+
+    def add_map(self, nodes, edges):
+        """Indexes a successfully parsed map; the first spelling seen for a concept is kept for display."""
+        names = list(dict.fromkeys(list(nodes) + [name for edge in edges for name in edge]))
+        concepts = [(normalize_concept(name), name) for name in names]
+        relations = {
+            tuple(sorted((normalize_concept(source), normalize_concept(target))))
+            for source, target in edges
+        }
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR IGNORE INTO concepts (key, name) VALUES (?, ?)", concepts)
+            self._db.executemany(
+                "INSERT OR IGNORE INTO relations (source, target) VALUES (?, ?)",
+                [relation for relation in relations if relation[0] != relation[1]],
+            )
+            known = set(self._keys)
+            self._keys.extend(key for key, _ in dict(concepts).items() if key not in known)
+
+    def _match(self, keyword):
+        """Returns the stored key for a keyword, trying an exact normalised match before a fuzzy one."""
+        key = normalize_concept(keyword)
+        if self._db.execute("SELECT 1 FROM concepts WHERE key = ?", (key,)).fetchone():
+            return key
+        close = difflib.get_close_matches(key, self._keys, n=1, cutoff=FUZZY_CUTOFF)
+        return close[0] if close else None
+
+    def _neighbours(self, key):
+        rows = self._db.execute(
+            "SELECT target FROM relations WHERE source = ? UNION SELECT source FROM relations WHERE target = ?",
+            (key, key),
+        )
+        return sorted(row[0] for row in rows)
+
+    def lookup_map(self, keyword, exclude=(), min_nodes=MIN_COVERAGE_NODES, max_nodes=MAX_SERVED_NODES):
+        """Returns (nodes, edges) around a known keyword, or None when the index can't cover it.
+
+        Concepts in `exclude` (normalised like everything else) don't count towards coverage, so an
+        expansion is only served when the index knows enough concepts the map doesn't have yet.
+        """
+        excluded = {normalize_concept(name) for name in exclude}
+        with self._lock:
+            root = self._match(keyword)
+            keys, edges = [root] if root else [], set()
+            queue = deque([root] if root else [])
+            while queue and len(keys) < max_nodes:
+                current = queue.popleft()
+                for neighbour in self._neighbours(current):
+                    if neighbour not in keys:
+                        if len(keys) == max_nodes:
+                            break
+                        keys.append(neighbour)
+                        queue.append(neighbour)
+                    edges.add(tuple(sorted((current, neighbour))))
+            direct = [key for key in self._neighbours(root) if key not in excluded] if root else []
+            covered = [key for key in keys if key not in excluded]
+            if len(covered) < min_nodes or len(direct) < MIN_DIRECT_RELATIONS:
+                self.misses += 1
+                return None
+            self.hits += 1
+            names = dict(self._db.execute(
+                f"SELECT key, name FROM concepts WHERE key IN ({','.join('?' * len(keys))})", keys
+            ).fetchall())
+
+        kept = set(keys)
+        return (
+            [names[key] for key in keys],
+            [(names[a], names[b]) for a, b in sorted(edges) if a in kept and b in kept],
+        )
+
+    def stats(self):
+        """Returns hit/miss counts; every hit is a model call saved."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "calls_saved": self.hits,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "concepts": len(self._keys),
+        }
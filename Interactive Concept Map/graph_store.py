@@ -0,0 +1,86 @@
+import sqlite3
+import threading
+import time
+
+
+# Function to normalise a keyword into a map key
+def normalize_keyword(keyword):
+    """Lower-cases a keyword and collapses whitespace."""
+    return " ".join(keyword.lower().split())
+
+
+class GraphStore:
+    """SQLite store of concept maps: their nodes (with layout positions) and edges, kept across sessions."""
+
+    def __init__(self, path="concept_maps.sqlite3"):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS maps (
+                    id INTEGER PRIMARY KEY,
+                    keyword TEXT NOT NULL UNIQUE,
+                    updated REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS nodes (
+                    map_id INTEGER NOT NULL REFERENCES maps(id) ON DELETE CASCADE,
+                    name TEXT NOT NULL,
+                    x REAL,
+                    y REAL,
+                    PRIMARY KEY (map_id, name)
+                );
+                CREATE TABLE IF NOT EXISTS edges (
+                    map_id INTEGER NOT NULL REFERENCES maps(id) ON DELETE CASCADE,
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    PRIMARY KEY (map_id, source, target)
+                );
+                """
+            )
+
+    def map_id(self, keyword):
+        """Returns the id of the map for `keyword`, creating an empty one if needed."""
+        key = normalize_keyword(keyword)
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO maps (keyword, updated) VALUES (?, ?)", (key, time.time()))
+            return self._db.execute("SELECT id FROM maps WHERE keyword = ?", (key,)).fetchone()[0]
+
+    def load(self, map_id):
+        """Returns (nodes, edges, positions) for a map; positions only include nodes that have been laid out."""
+        with self._lock:
+            rows = self._db.execute("SELECT name, x, y FROM nodes WHERE map_id = ? ORDER BY rowid", (map_id,)).fetchall()
+            edges = self._db.execute(
+                "SELECT source, target FROM edges WHERE map_id = ? ORDER BY rowid", (map_id,)
+            ).fetchall()
+        nodes = [name for name, _, _ in rows]
+        positions = {name: (x, y) for name, x, y in rows if x is not None}
+        return nodes, [tuple(edge) for edge in edges], positions
+
+    def merge(self, map_id, nodes, edges):
+        """Adds nodes and edges to a map (edge endpoints become nodes too); returns the names that were new."""
+        names = list(dict.fromkeys(list(nodes) + [name for edge in edges for name in edge]))
+        with self._lock, self._db:
+            existing = {row[0] for row in self._db.execute("SELECT name FROM nodes WHERE map_id = ?", (map_id,))}
+            added = [name for name in names if name not in existing]
+            self._db.executemany("INSERT INTO nodes (map_id, name) VALUES (?, ?)", [(map_id, name) for name in added])
+            self._db.executemany(
+                "INSERT OR IGNORE INTO edges (map_id, source, target) VALUES (?, ?, ?)",
+                [(map_id, source, target) for source, target in edges if source != target],
+            )
+            self._db.execute("UPDATE maps SET updated = ? WHERE id = ?", (time.time(), map_id))
+        return added
+
+    def save_positions(self, map_id, positions):
+        """Stores layout positions for a map's nodes."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE nodes SET x = ?, y = ? WHERE map_id = ? AND name = ?",
+                [(float(x), float(y), map_id, name) for name, (x, y) in positions.items()],
+            )
+
+    def clear(self, map_id):
+        """Removes every node and edge from a map, keeping the map itself."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM edges WHERE map_id = ?", (map_id,))
+            self._db.execute("DELETE FROM nodes WHERE map_id = ?", (map_id,))
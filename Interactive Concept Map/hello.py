@@ -1,10 +1,13 @@
 import os
 import gradio as gr
 import google.generativeai as genai
-import networkx as nx
-import plotly.graph_objects as go
-import json
+import time
 from dotenv import load_dotenv
+from concept_index import ConceptIndex
+from graph_store import GraphStore
+from layout import compute_layout, update_layout
+from model_router import ModelRouter
+from render import build_figure
 
 # Load environment variables from .env file
 load_dotenv()
@@ -28,7 +31,7 @@ model = genai.GenerativeModel(
 )
 
 flash_model = genai.GenerativeModel(
-    model_name="gemini-flash-1.5",
+    model_name="gemini-1.5-flash",
     generation_config={
         "temperature": 0.7,
         "top_p": 1.0,
@@ -37,8 +40,22 @@ flash_model = genai.GenerativeModel(
     }
 )
 
+# Short keywords go to flash_model first; detailed requests and failed fast answers go to the pro model
+router = ModelRouter(flash_model, model)
+# An expansion only has to add a few concepts around one node
+MIN_EXPANSION_NODES = 3
+
+# Minimum seconds between plot updates while a map is streaming in
+STREAM_RENDER_INTERVAL = 0.3
+
+# Concept maps persist across sessions so they can be expanded node by node
+database_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "concept_maps.sqlite3")
+graph_store = GraphStore(database_path)
+# Every parsed map also feeds a shared concept index, so overlapping keywords can skip the model
+concept_index = ConceptIndex(database_path)
+
 # Function to generate concept map data
-def generate_concept_map(keyword):
+def generate_concept_map(keyword, depth=False):
     prompt = f"""
     Given the keyword: '{keyword}', generate a structured concept map.
     Identify key concepts related to this keyword and define their relationships.
@@ -56,87 +73,114 @@ def generate_concept_map(keyword):
     }}
     """
     
-    try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        print("Raw Gemini Response:", response_text)  # Debugging output
-
-        # Ensure only JSON is parsed
-        if response_text.startswith("{") and response_text.endswith("}"):
-            response_json = json.loads(response_text)
+    return request_concept_map(prompt, keyword, depth)
+
+# Function to generate the neighbourhood of one node in an existing map
+def expand_concept_node(keyword, node, known_nodes, depth=False):
+    known = ", ".join(sorted(known_nodes))
+    prompt = f"""
+    A concept map about '{keyword}' already contains these concepts: {known}.
+    Expand the concept '{node}': identify concepts directly related to it and define their relationships.
+    Reuse an existing concept name exactly when a related concept is already on the map.
+    Respond strictly in JSON format with no additional text. Only return:
+    {{
+        "nodes": [
+            {{"name": "{node}"}},
+            {{"name": "Related1"}},
+            {{"name": "Related2"}}
+        ],
+        "edges": [
+            {{"source": "{node}", "target": "Related1"}},
+            {{"source": "{node}", "target": "Related2"}}
+        ]
+    }}
+    """
+    return request_concept_map(prompt, node, depth, MIN_EXPANSION_NODES)
+
+# Function to stream a concept map from whichever model the router picks
+def request_concept_map(prompt, keyword, depth=False, min_nodes=None):
+    yield from router.stream(prompt, keyword, depth, min_nodes)
+    print("Model routing:", router.stats())  # Per-tier latency and escalation monitoring
+
+# Function to answer from the concept index when it covers the keyword, calling the model otherwise
+def indexed_concept_map(keyword, generate, exclude=()):
+    indexed = concept_index.lookup_map(keyword, exclude=exclude)
+    if indexed is not None:
+        yield indexed
+    else:
+        nodes, edges = [], []
+        for new_nodes, new_edges in generate():
+            nodes.extend(new_nodes)
+            edges.extend(new_edges)
+            yield new_nodes, new_edges
+        if nodes or edges:
+            concept_index.add_map(nodes, edges)
+    print("Concept index:", concept_index.stats())  # Hit-rate monitoring
+
+# Function to lay out and draw the stored map
+def render_map(map_id, saved_positions, final=False):
+    """
+    Lays out nodes that `saved_positions` (the layout stored before this request) doesn't cover.
+    Streaming frames are drawn but not saved, so the stored layout never depends on chunk timing;
+    the final frame saves it.
+    """
+    nodes, edges, _ = graph_store.load(map_id)
+    positions = saved_positions
+    if any(node not in saved_positions for node in nodes):
+        if saved_positions:
+            # Expansions grow around the saved layout instead of recomputing it from scratch
+            positions = update_layout(nodes, edges, saved_positions)
         else:
-            raise ValueError("Invalid JSON format received from API")
-        
-        nodes = {node["name"] for node in response_json.get("nodes", [])}
-        edges = [(edge["source"], edge["target"]) for edge in response_json.get("edges", [])]
-        
-        return nodes, edges
-    except Exception as e:
-        print("Error parsing response:", e)
-        return set(), []  # Return empty graph data on error
-
-# Function to visualize the concept map
-def generate_visualization(keyword):
-    nodes, edges = generate_concept_map(keyword)
-    
-    G = nx.Graph()
-    G.add_nodes_from(nodes)
-    G.add_edges_from(edges)
-    
-    pos = nx.spring_layout(G)
-    edge_x, edge_y = [], []
-    
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-    
-    edge_trace = go.Scatter(
-        x=edge_x, y=edge_y,
-        line=dict(width=1, color='black'),
-        hoverinfo='none',
-        mode='lines'
-    )
-    
-    node_x, node_y, node_text = [], [], []
-    for node in nodes:
-        x, y = pos[node]
-        node_x.append(x)
-        node_y.append(y)
-        node_text.append(node)
-    
-    node_trace = go.Scatter(
-        x=node_x, y=node_y,
-        mode='markers+text',
-        marker=dict(size=10, color='skyblue'),
-        text=node_text,
-        textposition='top center',
-        hoverinfo='text'
-    )
-    
-    fig = go.Figure(data=[edge_trace, node_trace])
-    fig.update_layout(
-        title="Generated Concept Map",
-        showlegend=False,
-        hovermode='closest',
-        margin=dict(b=0, l=0, r=0, t=40),
-        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
-    )
-    
-    return fig
+            # A new map gets the deterministic, seeded layout of the whole graph
+            positions = compute_layout(nodes, edges)
+        if final:
+            graph_store.save_positions(map_id, positions)
+    return build_figure(nodes, edges, positions)
+
+# Function to visualize the concept map, yielding a redrawn figure as streamed concepts arrive
+def generate_visualization(keyword, expand_node="", start_over=False, depth=False):
+    map_id = graph_store.map_id(keyword)
+    if start_over:
+        graph_store.clear(map_id)
+    nodes, edges, positions = graph_store.load(map_id)
+    expand_node = expand_node.strip()
+
+    batches = []
+    if not nodes:
+        # First visit: one full generation
+        batches = indexed_concept_map(keyword, lambda: generate_concept_map(keyword, depth))
+    elif expand_node:
+        # Only ask the model for the chosen node's neighbourhood
+        batches = indexed_concept_map(
+            expand_node, lambda: expand_concept_node(keyword, expand_node, nodes, depth), exclude=nodes
+        )
+    # Otherwise the stored map is shown as-is, without a model call
+
+    last_render = time.monotonic()
+    for new_nodes, new_edges in batches:
+        graph_store.merge(map_id, new_nodes, new_edges)
+        # Redraw at most every STREAM_RENDER_INTERVAL seconds; later batches are picked up by the next draw
+        if time.monotonic() - last_render >= STREAM_RENDER_INTERVAL:
+            last_render = time.monotonic()
+            yield render_map(map_id, positions)
+
+    yield render_map(map_id, positions, final=True)
 
 # Gradio interface
-def gradio_interface(keyword):
-    return generate_visualization(keyword)
+def gradio_interface(keyword, expand_node, start_over, depth):
+    yield from generate_visualization(keyword, expand_node, start_over, depth)
 
 iface = gr.Interface(
     fn=gradio_interface,
-    inputs=[gr.Textbox(label="Enter a Keyword")],
+    inputs=[
+        gr.Textbox(label="Enter a Keyword"),
+        gr.Textbox(label="Concept to Expand (optional)"),
+        gr.Checkbox(label="Start this map over", value=False),
+        gr.Checkbox(label="Detailed map (slower, uses the larger model)", value=False)
+    ],
     outputs=gr.Plot(label="Concept Map Output"),
     title="Concept Map Generator",
-    description="Enter a single word or short phrase to generate a concept map."
+    description="Enter a single word or short phrase to generate a concept map. Maps are saved, so you can come back and expand any concept on them."
 )
 
 iface.launch()
\ No newline at end of file
@@ -0,0 +1,238 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+import networkx as nx
+import numpy as np
+
+# Seed for every layout, so the same map always renders the same way
+DEFAULT_SEED = 42
+# Up to this many nodes networkx's spring_layout is fast enough; larger graphs use the NumPy engine
+SMALL_GRAPH_NODES = 300
+# Above this many nodes repulsion is approximated through grid cells instead of all node pairs
+EXACT_REPULSION_NODES = 1000
+# Average number of nodes per grid cell in the approximate repulsion
+NODES_PER_CELL = 32
+
+
+# Function to hash a graph's structure
+def graph_hash(nodes, edges, seed=DEFAULT_SEED):
+    """Returns a key that only depends on the node set, the undirected edge set and the seed."""
+    digest = hashlib.sha1(repr(seed).encode())
+    for node in sorted(map(str, nodes)):
+        digest.update(b"n\0" + node.encode() + b"\0")
+    for edge in sorted(tuple(sorted(map(str, edge))) for edge in edges):
+        digest.update(b"e\0" + edge[0].encode() + b"\0" + edge[1].encode() + b"\0")
+    return digest.hexdigest()
+
+
+# Function to sum inverse-distance pushes from a set of points
+def _push(x, y, px, py, weight, k):
+    """Sums weight * k^2 / d along (node - point) for every node, using 2-D x/y arrays rather than (n, m, 2)."""
+    dx = x[:, None] - px[None, :]
+    dy = y[:, None] - py[None, :]
+    scale = weight * (k * k) / np.maximum(dx * dx + dy * dy, 1e-9)
+    return (dx * scale).sum(axis=1), (dy * scale).sum(axis=1)
+
+
+# Function to compute node-to-node repulsion exactly
+def _exact_repulsion(pos, k, chunk=1024):
+    """Fruchterman-Reingold repulsion k^2/d between every pair, in row chunks to bound memory."""
+    x, y = pos[:, 0], pos[:, 1]
+    displacement = np.empty_like(pos)
+    for start in range(0, len(pos), chunk):
+        rows = slice(start, start + chunk)
+        displacement[rows, 0], displacement[rows, 1] = _push(x[rows], y[rows], x, y, 1.0, k)
+    return displacement
+
+
+# Function to approximate repulsion through grid-cell centres of mass
+def _grid_repulsion(pos, k):
+    """Barnes-Hut-style single-level approximation: every node is pushed by each grid cell's centre of mass.
+
+    The push of a node's own cell is swapped for the centre of mass of the *other* nodes in it, which
+    keeps nodes from pushing themselves.
+    """
+    n = len(pos)
+    cells_per_side = max(1, int(np.sqrt(n / NODES_PER_CELL)))
+    low, high = pos.min(axis=0), pos.max(axis=0)
+    cell_xy = np.minimum(((pos - low) / np.maximum(high - low, 1e-9) * cells_per_side).astype(np.intp), cells_per_side - 1)
+    cell = cell_xy[:, 0] * cells_per_side + cell_xy[:, 1]
+    n_cells = cells_per_side * cells_per_side
+
+    mass = np.bincount(cell, minlength=n_cells).astype(np.float64)
+    sum_x = np.bincount(cell, weights=pos[:, 0], minlength=n_cells)
+    sum_y = np.bincount(cell, weights=pos[:, 1], minlength=n_cells)
+    occupied = mass > 0
+    cx, cy = sum_x[occupied] / mass[occupied], sum_y[occupied] / mass[occupied]
+    x, y = pos[:, 0], pos[:, 1]
+
+    displacement = np.empty_like(pos)
+    chunk = max(1, 4_000_000 // int(occupied.sum()))
+    for start in range(0, n, chunk):
+        rows = slice(start, start + chunk)
+        displacement[rows, 0], displacement[rows, 1] = _push(x[rows], y[rows], cx, cy, mass[occupied], k)
+
+    # Remove each node's own-cell term and add back the push from the rest of its cell
+    own_mass = mass[cell]
+    own_dx, own_dy = x - sum_x[cell] / own_mass, y - sum_y[cell] / own_mass
+    own_scale = own_mass * (k * k) / np.maximum(own_dx * own_dx + own_dy * own_dy, 1e-9)
+    others = own_mass - 1
+    rest_dx = x - (sum_x[cell] - x) / np.maximum(others, 1)
+    rest_dy = y - (sum_y[cell] - y) / np.maximum(others, 1)
+    rest_scale = others * (k * k) / np.maximum(rest_dx * rest_dx + rest_dy * rest_dy, 1e-9)
+    displacement[:, 0] += rest_dx * rest_scale - own_dx * own_scale
+    displacement[:, 1] += rest_dy * rest_scale - own_dy * own_scale
+    return displacement
+
+
+# Function to lay out a large graph with vectorised NumPy
+def force_directed_layout(n, edge_index, iterations=50, seed=DEFAULT_SEED, initial=None, fixed=None, temperature=0.1):
+    """Fruchterman-Reingold layout of n nodes with (m, 2) integer `edge_index`, returning an (n, 2) array.
+
+    `initial` seeds positions (e.g. a previous layout); nodes flagged in the boolean `fixed` mask never move.
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.random((n, 2)) if initial is None else np.array(initial, dtype=np.float64)
+    if n < 2:
+        return pos
+    k = np.sqrt(1.0 / n)
+    repulsion = _exact_repulsion if n <= EXACT_REPULSION_NODES else _grid_repulsion
+    source, target = edge_index[:, 0], edge_index[:, 1]
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        displacement = repulsion(pos, k)
+        if len(edge_index):
+            delta = pos[source] - pos[target]
+            distance = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-9)
+            pull = delta * (distance / k)[:, None]
+            for c in range(2):
+                displacement[:, c] -= np.bincount(source, weights=pull[:, c], minlength=n)
+                displacement[:, c] += np.bincount(target, weights=pull[:, c], minlength=n)
+        if fixed is not None:
+            displacement[fixed] = 0
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-9)
+        pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+    return pos
+
+
+class LayoutCache:
+    """Thread-safe LRU cache of node positions keyed by graph_hash."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key, positions):
+        with self._lock:
+            self._entries[key] = positions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+layout_cache = LayoutCache()
+
+
+# Function to compute (or reuse) a deterministic layout
+def compute_layout(nodes, edges, seed=DEFAULT_SEED, cache=layout_cache):
+    """Returns {node: (x, y)} scaled to [-1, 1], reusing a cached layout when the graph is unchanged."""
+    key = graph_hash(nodes, edges, seed)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    nodes = sorted(set(nodes) | {node for edge in edges for node in edge}, key=str)
+    if len(nodes) <= SMALL_GRAPH_NODES:
+        G = nx.Graph()
+        G.add_nodes_from(nodes)
+        G.add_edges_from(edges)
+        positions = {node: tuple(xy) for node, xy in nx.spring_layout(G, seed=seed).items()}
+    else:
+        index = {node: i for i, node in enumerate(nodes)}
+        edge_index = np.array([(index[a], index[b]) for a, b in edges if a != b], dtype=np.intp).reshape((-1, 2))
+        coordinates = nx.rescale_layout(force_directed_layout(len(nodes), edge_index, seed=seed))
+        positions = {node: tuple(xy) for node, xy in zip(nodes, coordinates)}
+
+    if cache is not None:
+        cache.put(key, positions)
+    return positions
+
+
+# Function to extend an existing layout with new nodes
+def update_layout(nodes, edges, previous, seed=DEFAULT_SEED, iterations=30, cache=layout_cache):
+    """Returns {node: (x, y)} for a grown graph, starting from `previous` positions instead of from scratch.
+
+    New nodes start next to the already-placed nodes they connect to; everything is then relaxed with a
+    short, cool force-directed run so old nodes only drift slightly. Coordinates keep `previous`'s frame
+    (no rescaling), so the existing map stays where the user last saw it.
+    """
+    nodes = sorted(set(nodes) | {node for edge in edges for node in edge}, key=str)
+    placed = [node for node in nodes if node in previous]
+    if not placed:
+        return compute_layout(nodes, edges, seed, cache)
+
+    index = {node: i for i, node in enumerate(nodes)}
+    edge_index = np.array([(index[a], index[b]) for a, b in edges if a != b], dtype=np.intp).reshape((-1, 2))
+    rng = np.random.default_rng(seed)
+
+    # Work in the unit square the force model is tuned for, then map back to the caller's frame
+    old = np.array([previous[node] for node in placed], dtype=np.float64)
+    low, span = old.min(axis=0), np.maximum(np.ptp(old, axis=0), 1e-9)
+    pos = np.full((len(nodes), 2), np.nan)
+    for node in placed:
+        pos[index[node]] = (np.asarray(previous[node]) - low) / span
+    neighbours = {i: [] for i in range(len(nodes))}
+    for a, b in edge_index:
+        neighbours[a].append(b)
+        neighbours[b].append(a)
+    for i in np.flatnonzero(np.isnan(pos[:, 0])):
+        anchors = [pos[j] for j in neighbours[i] if not np.isnan(pos[j, 0])]
+        centre = np.mean(anchors, axis=0) if anchors else np.full(2, 0.5)
+        pos[i] = centre + rng.normal(scale=0.05, size=2)
+
+    pos = force_directed_layout(len(nodes), edge_index, iterations, seed, initial=pos, temperature=0.01)
+    positions = {node: tuple(xy) for node, xy in zip(nodes, pos * span + low)}
+    if cache is not None:
+        cache.put(graph_hash(nodes, edges, seed), positions)
+    return positions
+
+
+# Time layouts of random sparse graphs: python layout.py [num_nodes ...]
+if __name__ == "__main__":
+    for n in [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]:
+        G = nx.gnm_random_graph(n, 2 * n, seed=1)
+        nodes, edges = list(G.nodes), list(G.edges)
+
+        start = time.perf_counter()
+        compute_layout(nodes, edges, cache=None)
+        layout_ms = (time.perf_counter() - start) * 1000
+
+        cache = LayoutCache()
+        compute_layout(nodes, edges, cache=cache)
+        start = time.perf_counter()
+        compute_layout(nodes, edges, cache=cache)
+        cached_ms = (time.perf_counter() - start) * 1000
+
+        line = f"{n:>6} nodes: layout {layout_ms:9.1f} ms, cached {cached_ms:7.2f} ms"
+        if n <= 2000:
+            start = time.perf_counter()
+            nx.spring_layout(G, seed=DEFAULT_SEED)
+            line += f", nx.spring_layout {(time.perf_counter() - start) * 1000:9.1f} ms"
+        print(line)
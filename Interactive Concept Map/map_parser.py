@@ -0,0 +1,103 @@
+import json
+import sys
+import time
+
+
+class IncrementalMapParser:
+    """Parses a concept map JSON document as it streams in, emitting each node and edge once it is complete.
+
+    Only the `{"nodes": [...], "edges": [...]}` shape is tracked: every object that closes directly inside
+    one of those arrays is decoded on its own, so a response cut off mid-way (e.g. at max_output_tokens)
+    still yields everything before the cut. Text before the first `{` (such as a ```json fence) is ignored.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.edges = []
+        self.complete = False
+        self._text = ""
+        self._scanned = 0
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_key = None
+        self._array_key = None
+        self._item_start = None
+
+    def feed(self, chunk):
+        """Consumes the next piece of text and returns (new_nodes, new_edges) completed by it."""
+        self._text += chunk
+        new_nodes, new_edges = [], []
+        text = self._text
+        for i in range(self._scanned, len(text)):
+            char = text[i]
+            if self.complete:
+                break
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_key = text[self._string_start:i + 1]
+            elif char == '"' and self._stack:
+                self._in_string, self._string_start = True, i
+            elif char == "{" or (char == "[" and self._stack):  # Only an object opens the document
+                if char == "{" and self._stack == ["{", "["]:
+                    self._item_start = i
+                elif char == "[" and self._stack == ["{"]:
+                    self._array_key = json.loads(self._last_key) if self._last_key else None
+                self._stack.append(char)
+            elif char in "}]" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._stack == ["{", "["] and self._item_start is not None:
+                    self._emit(text[self._item_start:i + 1], new_nodes, new_edges)
+                    self._item_start = None
+                elif not self._stack:
+                    self.complete = True
+        self._scanned = len(text)
+        return new_nodes, new_edges
+
+    def _emit(self, item_text, new_nodes, new_edges):
+        """Decodes one array item and records it if it has the expected fields."""
+        try:
+            item = json.loads(item_text)
+        except ValueError:
+            return
+        if self._array_key == "nodes" and isinstance(item.get("name"), str):
+            self.nodes.append(item["name"])
+            new_nodes.append(item["name"])
+        elif self._array_key == "edges" and isinstance(item.get("source"), str) and isinstance(item.get("target"), str):
+            self.edges.append((item["source"], item["target"]))
+            new_edges.append((item["source"], item["target"]))
+
+
+# Function to parse a whole (possibly truncated) concept map response
+def parse_concept_map(text):
+    """Returns (nodes, edges) salvaged from `text`, keeping every complete node and edge."""
+    parser = IncrementalMapParser()
+    parser.feed(text)
+    return parser.nodes, parser.edges
+
+
+# Show what survives a response cut off at several points: python map_parser.py [num_nodes]
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    document = json.dumps({
+        "nodes": [{"name": f"Concept {i}"} for i in range(n)],
+        "edges": [{"source": "Concept 0", "target": f"Concept {i}"} for i in range(1, n)],
+    }, indent=2)
+
+    for cut in [len(document) // 4, len(document) // 2, len(document) * 3 // 4, len(document) - 3, len(document)]:
+        nodes, edges = parse_concept_map(document[:cut])
+        print(f"cut at {cut:>5}/{len(document)} chars: {len(nodes):>3} nodes, {len(edges):>3} edges salvaged")
+
+    # Streaming in small chunks must give the same result as parsing the whole text
+    parser, start = IncrementalMapParser(), time.perf_counter()
+    for offset in range(0, len(document), 16):
+        parser.feed(document[offset:offset + 16])
+    assert (parser.nodes, parser.edges) == parse_concept_map(document) and parser.complete
+    print(f"streamed in 16-char chunks: {(time.perf_counter() - start) * 1000:.2f} ms")
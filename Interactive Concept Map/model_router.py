@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from map_parser import IncrementalMapParser
+
+# Keywords of at most this many words (and FAST_MAX_CHARS characters) go to the fast tier first
+FAST_MAX_WORDS = 3
+FAST_MAX_CHARS = 40
+# A fast-tier map with fewer distinct concepts than this is escalated to the strong tier
+MIN_MAP_NODES = 5
+# Latency samples kept per tier for the percentile metrics
+LATENCY_SAMPLES = 500
+
+
+class ModelRouter:
+    """Routes concept map requests between a fast and a strong model, escalating when the fast answer fails.
+
+    The fast tier answers short keywords; the strong tier answers long or detailed requests directly, and
+    re-answers any fast response that is incomplete JSON or has too few concepts. Both tiers stream, so
+    whatever the fast tier got right is already on the map while the strong tier runs.
+    """
+
+    def __init__(self, fast_model, strong_model, min_nodes=MIN_MAP_NODES):
+        self.models = {"fast": fast_model, "strong": strong_model}
+        self.min_nodes = min_nodes
+        self.requests = 0
+        self.escalations = 0
+        self._calls = {tier: 0 for tier in self.models}
+        self._failures = {tier: 0 for tier in self.models}
+        self._latencies = {tier: deque(maxlen=LATENCY_SAMPLES) for tier in self.models}
+        self._lock = threading.Lock()
+
+    def choose_tier(self, keyword, depth=False):
+        """Returns the tier a request starts on."""
+        if depth or len(keyword.split()) > FAST_MAX_WORDS or len(keyword) > FAST_MAX_CHARS:
+            return "strong"
+        return "fast"
+
+    def _stream(self, tier, prompt, parser, min_nodes):
+        """Streams one model's answer into `parser`, yielding (new_nodes, new_edges) batches."""
+        start = time.perf_counter()
+        response_text = ""
+        try:
+            for chunk in self.models[tier].generate_content(prompt, stream=True):
+                response_text += chunk.text
+                new_nodes, new_edges = parser.feed(chunk.text)
+                if new_nodes or new_edges:
+                    yield new_nodes, new_edges
+        except Exception as e:
+            print(f"Error streaming {tier} response:", e)
+        print(f"Raw Gemini Response ({tier}):", response_text)  # Debugging output
+        if not parser.complete:
+            # Everything parsed before the cut has already been yielded
+            print(f"Incomplete {tier} response: salvaged {len(parser.nodes)} nodes and {len(parser.edges)} edges")
+
+        with self._lock:
+            self._calls[tier] += 1
+            self._latencies[tier].append(time.perf_counter() - start)
+            if not self.valid(parser, min_nodes):
+                self._failures[tier] += 1
+
+    @staticmethod
+    def valid(parser, min_nodes):
+        """A usable map is complete JSON with at least `min_nodes` distinct concepts."""
+        return parser.complete and len(set(parser.nodes)) >= min_nodes
+
+    def stream(self, prompt, keyword, depth=False, min_nodes=None):
+        """Yields (new_nodes, new_edges) batches from the routed model, escalating once if needed."""
+        min_nodes = self.min_nodes if min_nodes is None else min_nodes
+        tier = self.choose_tier(keyword, depth)
+        with self._lock:
+            self.requests += 1
+
+        parser = IncrementalMapParser()
+        yield from self._stream(tier, prompt, parser, min_nodes)
+        if tier == "strong" or self.valid(parser, min_nodes):
+            return
+
+        with self._lock:
+            self.escalations += 1
+        print(f"Escalating '{keyword}' to the strong model: {len(set(parser.nodes))} concepts, complete={parser.complete}")
+        seen_nodes, seen_edges = set(parser.nodes), set(parser.edges)
+        for new_nodes, new_edges in self._stream("strong", prompt, IncrementalMapParser(), min_nodes):
+            # Only pass on what the fast tier didn't already deliver
+            new_nodes = [node for node in new_nodes if node not in seen_nodes]
+            new_edges = [edge for edge in new_edges if edge not in seen_edges]
+            seen_nodes.update(new_nodes)
+            seen_edges.update(new_edges)
+            if new_nodes or new_edges:
+                yield new_nodes, new_edges
+
+    def stats(self):
+        """Returns per-tier call counts, failure rates and latency percentiles, plus the escalation rate."""
+        with self._lock:
+            tiers = {}
+            for tier in self.models:
+                latencies = np.array(self._latencies[tier])
+                tiers[tier] = {
+                    "calls": self._calls[tier],
+                    "failure_rate": round(self._failures[tier] / self._calls[tier], 3) if self._calls[tier] else 0.0,
+                    "p50_seconds": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+                    "p95_seconds": round(float(np.percentile(latencies, 95)), 3) if len(latencies) else None,
+                }
+            return {
+                "requests": self.requests,
+                "escalations": self.escalations,
+                "escalation_rate": round(self.escalations / self.requests, 3) if self.requests else 0.0,
+                "tiers": tiers,
+            }
@@ -0,0 +1,155 @@
+import sys
+import time
+import networkx as nx
+import numpy as np
+import plotly.graph_objects as go
+
+# Above this many nodes the figure is drawn with WebGL (Scattergl) instead of SVG
+WEBGL_NODES = 500
+# Above this many nodes labels are shown on hover only; drawing thousands of text labels stalls the browser
+LABELED_NODES = 300
+# Above this many nodes dense regions are merged into grid-cell markers (when `aggregate` is left to auto)
+AGGREGATE_NODES = 5000
+# Grid cells per side used when aggregating
+AGGREGATE_GRID = 32
+# Names listed in an aggregated marker's hover text
+AGGREGATE_SAMPLE_NAMES = 5
+
+
+# Function to turn a positions dict into coordinate arrays
+def _coordinates(nodes, edges, pos):
+    """Returns (names, xy, edge_index): node names, an (n, 2) float32 array and an (m, 2) index array."""
+    names = list(dict.fromkeys(list(nodes) + [name for edge in edges for name in edge]))
+    index = {name: i for i, name in enumerate(names)}
+    xy = np.array([pos[name] for name in names], dtype=np.float32).reshape((-1, 2))
+    edge_index = np.array([(index[a], index[b]) for a, b in edges if a != b], dtype=np.intp).reshape((-1, 2))
+    # The map is undirected, so A->B and B->A are one edge
+    edge_index = np.unique(np.sort(edge_index, axis=1), axis=0).reshape((-1, 2))
+    return names, xy, edge_index
+
+
+# Function to build all edge segments in one shot
+def _edge_arrays(xy, edge_index):
+    """Returns x/y arrays of "x0, x1, NaN" triples; NaN breaks the line between segments like None does."""
+    segments = np.full((len(edge_index), 3, 2), np.nan, dtype=np.float32)
+    segments[:, 0] = xy[edge_index[:, 0]]
+    segments[:, 1] = xy[edge_index[:, 1]]
+    return segments[:, :, 0].ravel(), segments[:, :, 1].ravel()
+
+
+# Function to merge nodes that share a grid cell
+def _aggregate(names, xy, edge_index, grid=AGGREGATE_GRID):
+    """Collapses nodes into occupied grid cells: returns (labels, cell centroids, node counts, cell edges)."""
+    low, span = xy.min(axis=0), np.maximum(np.ptp(xy, axis=0), 1e-9)
+    cell_xy = np.minimum(((xy - low) / span * grid).astype(np.intp), grid - 1)
+    cells, cell_of_node = np.unique(cell_xy[:, 0] * grid + cell_xy[:, 1], return_inverse=True)
+    counts = np.bincount(cell_of_node, minlength=len(cells))
+    centroids = np.stack([
+        np.bincount(cell_of_node, weights=xy[:, c], minlength=len(cells)) / counts for c in range(2)
+    ], axis=1).astype(np.float32)
+
+    # Edges inside a cell disappear; parallel edges between two cells are drawn once
+    cell_edges = np.sort(cell_of_node[edge_index], axis=1)
+    cell_edges = np.unique(cell_edges[cell_edges[:, 0] != cell_edges[:, 1]], axis=0).reshape((-1, 2))
+
+    members = [[] for _ in range(len(cells))]
+    for name, cell in zip(names, cell_of_node):
+        if len(members[cell]) < AGGREGATE_SAMPLE_NAMES:
+            members[cell].append(str(name))
+    labels = [
+        names_in_cell[0] if count == 1 else f"{count} concepts: {', '.join(names_in_cell)}, ..."
+        for names_in_cell, count in zip(members, counts)
+    ]
+    return labels, centroids, counts, cell_edges
+
+
+# Function to build the concept map figure from arrays
+def build_figure(nodes, edges, pos, webgl=None, aggregate=None, title="Generated Concept Map"):
+    """Builds the concept map figure with vectorised coordinates.
+
+    `webgl` and `aggregate` default to automatic choices from WEBGL_NODES and AGGREGATE_NODES. Coordinates
+    are float32 NumPy arrays, which plotly serialises as compact base64 typed arrays rather than JSON lists.
+    """
+    names, xy, edge_index = _coordinates(nodes, edges, pos)
+    n = len(names)
+    webgl = n > WEBGL_NODES if webgl is None else webgl
+    aggregate = n > AGGREGATE_NODES if aggregate is None else aggregate
+    scatter = go.Scattergl if webgl else go.Scatter
+
+    marker = dict(size=10, color='skyblue')
+    if aggregate and n:
+        names, xy, counts, edge_index = _aggregate(names, xy, edge_index)
+        marker["size"] = (6 + 3 * np.sqrt(counts)).astype(np.float32)
+
+    edge_x, edge_y = _edge_arrays(xy, edge_index)
+    edge_trace = scatter(
+        x=edge_x, y=edge_y,
+        line=dict(width=1, color='black'),
+        hoverinfo='none',
+        mode='lines'
+    )
+
+    labeled = len(names) <= LABELED_NODES
+    node_trace = scatter(
+        x=xy[:, 0], y=xy[:, 1],
+        mode='markers+text' if labeled else 'markers',
+        marker=marker,
+        text=names,
+        textposition='top center',
+        hoverinfo='text'
+    )
+
+    fig = go.Figure(data=[edge_trace, node_trace])
+    fig.update_layout(
+        # An empty template keeps plotly's default theme (several KB) out of every payload
+        template="none",
+        plot_bgcolor="#E5ECF6",
+        title=title,
+        showlegend=False,
+        hovermode='closest',
+        margin=dict(b=0, l=0, r=0, t=40),
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
+    )
+    return fig
+
+
+# Function to build the figure the way the app originally did, kept as the benchmark baseline
+def _loop_figure(nodes, edges, pos):
+    edge_x, edge_y = [], []
+    for a, b in edges:
+        x0, y0 = pos[a]
+        x1, y1 = pos[b]
+        edge_x.extend([x0, x1, None])
+        edge_y.extend([y0, y1, None])
+    node_x, node_y = zip(*(pos[node] for node in nodes))
+    return go.Figure(data=[
+        go.Scatter(x=edge_x, y=edge_y, line=dict(width=1, color='black'), hoverinfo='none', mode='lines'),
+        go.Scatter(x=node_x, y=node_y, mode='markers+text', marker=dict(size=10, color='skyblue'),
+                   text=list(nodes), textposition='top center', hoverinfo='text'),
+    ])
+
+
+# Compare figure build time and payload size: python render.py [num_nodes ...]
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    build_figure(["a", "b"], [("a", "b")], {"a": (0, 0), "b": (1, 1)}).to_json()  # Warm up plotly's validators
+    for n in [int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000]:
+        G = nx.gnm_random_graph(n, 2 * n, seed=1)
+        nodes = [f"Concept {i}" for i in G.nodes]
+        edges = [(f"Concept {a}", f"Concept {b}") for a, b in G.edges]
+        pos = {node: tuple(xy) for node, xy in zip(nodes, rng.random((n, 2)))}
+
+        variants = [("original", lambda: _loop_figure(nodes, edges, pos)), ("auto", lambda: build_figure(nodes, edges, pos))]
+        if n > AGGREGATE_NODES:
+            variants.append(("no aggregation", lambda: build_figure(nodes, edges, pos, aggregate=False)))
+        for label, build in variants:
+            start = time.perf_counter()
+            fig = build()
+            build_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            payload = fig.to_json()
+            json_ms = (time.perf_counter() - start) * 1000
+            kind = fig.data[1].type
+            print(f"{n:>6} nodes {label:>15} ({kind:>9}): build {build_ms:8.1f} ms, "
+                  f"to_json {json_ms:8.1f} ms, payload {len(payload) / 1024:8.1f} KB")
@@ -0,0 +1,114 @@
+import hashlib
+import io
+import math
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+
+# Long edge of cached thumbnails, and the square tile size used in the collage
+THUMBNAIL_SIZE = 320
+# Images whose perceptual hashes differ in at most this many of 64 bits, and whose average
+# colours are within DUPLICATE_COLOR_DISTANCE per channel, count as duplicates
+DUPLICATE_HASH_DISTANCE = 6
+DUPLICATE_COLOR_DISTANCE = 24
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thumbnail_cache")
+
+
+# Function to decode an image straight to thumbnail size
+def _decode_thumbnail(data, size):
+    """Decodes image bytes into an RGB thumbnail; JPEGs are DCT-scaled while decoding, so the full image is never built."""
+    image = Image.open(io.BytesIO(data))
+    image.draft("RGB", (size, size))
+    image = image.convert("RGB")
+    image.thumbnail((size, size))
+    return image
+
+
+# Function to fetch one thumbnail through the on-disk cache
+def fetch_thumbnail(session, url, size=THUMBNAIL_SIZE, cache_dir=THUMBNAIL_CACHE_DIR, timeout=(3.05, 10)):
+    """Returns an RGB thumbnail for `url`, downloading and caching it on disk by URL hash on a miss."""
+    path = os.path.join(cache_dir, f"{hashlib.sha1(f'{url}|{size}'.encode()).hexdigest()}.jpg")
+    if os.path.exists(path):
+        with Image.open(path) as cached:
+            return cached.convert("RGB")
+
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    image = _decode_thumbnail(response.content, size)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # A unique temp file per call: boards run as threads of one process and often fetch the same URL
+    with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".tmp", delete=False) as temp:
+        image.save(temp, "JPEG", quality=90)
+    os.replace(temp.name, path)  # Atomic, so concurrent boards never read a half-written thumbnail
+    return image
+
+
+# Function to fetch many thumbnails concurrently
+def fetch_thumbnails(session, urls, size=THUMBNAIL_SIZE, workers=8, cache_dir=THUMBNAIL_CACHE_DIR):
+    """Downloads thumbnails on a thread pool, returning (url, image) pairs in input order and skipping failures."""
+    def fetch(url):
+        try:
+            return url, fetch_thumbnail(session, url, size, cache_dir)
+        except Exception as e:
+            print("Skipping image:", url, e)
+            return url, None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as pool:
+        return [(url, image) for url, image in pool.map(fetch, urls) if image is not None]
+
+
+# Function to compute a perceptual difference hash
+def dhash(image, hash_size=8):
+    """Returns a 64-bit difference hash that survives resizing and recompression."""
+    pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+# Function to drop near-identical images
+def remove_duplicates(items, max_distance=DUPLICATE_HASH_DISTANCE, max_color_distance=DUPLICATE_COLOR_DISTANCE):
+    """Keeps the first of every group of near-identical (url, image) pairs.
+
+    dhash only sees luminance structure, so the average colour is compared too; otherwise
+    recoloured variants of the same layout would be merged.
+    """
+    kept, signatures = [], []
+    for url, image in items:
+        value, color = dhash(image), image.resize((1, 1), Image.BOX).getpixel((0, 0))
+        duplicate = any(
+            bin(value ^ other).count("1") <= max_distance
+            and max(abs(a - b) for a, b in zip(color, other_color)) <= max_color_distance
+            for other, other_color in signatures
+        )
+        if not duplicate:
+            kept.append((url, image))
+            signatures.append((value, color))
+    return kept
+
+
+# Function to compose thumbnails into a single collage
+def compose_collage(images, tile=THUMBNAIL_SIZE, gap=8, background=(255, 255, 255)):
+    """Lays images out as square centre-cropped tiles in a near-square grid."""
+    columns = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+    collage = Image.new("RGB", (columns * tile + (columns + 1) * gap, rows * tile + (rows + 1) * gap), background)
+    for i, image in enumerate(images):
+        row, col = divmod(i, columns)
+        collage.paste(ImageOps.fit(image, (tile, tile)), (gap + col * (tile + gap), gap + row * (tile + gap)))
+    return collage
+
+
+# Function to render a mood board collage from image URLs
+def render_collage(session, urls, tile=THUMBNAIL_SIZE, workers=8):
+    """Downloads, de-duplicates and composes the images behind `urls`; returns None if none could be fetched."""
+    thumbnails = remove_duplicates(fetch_thumbnails(session, urls, tile, workers))
+    if not thumbnails:
+        return None
+    return compose_collage([image for _, image in thumbnails], tile)
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import numpy as np
+from collage import fetch_thumbnails
+
+# The palette engine lives in the sibling Palette generator tool
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Palette generator"))
+from palette_engine import batched_histograms, cluster_colors  # noqa: E402
+
+# How many candidates to fetch per requested board image
+CANDIDATE_FACTOR = 3
+# Edge length of the thumbnails analysed for colour; Pixabay's previewURL images are ~150 px
+ANALYSIS_SIZE = 64
+# Histogram depth for the analysis; _similarity_matrix folds these 4-bit bins into 3-bit ones
+ANALYSIS_BITS = 4
+# Colours in the unified board palette and in each candidate's compact palette
+BOARD_PALETTE_SIZE = 5
+# End-to-end target for an interactive harmonised board, in seconds
+LATENCY_BUDGET_SECONDS = 3.0
+
+
+# Function to compare every candidate's colours with every other's
+def _similarity_matrix(counts):
+    """Returns the pairwise Bhattacharyya coefficients (0-1) of the candidates' colour histograms."""
+    # Fold the 4-bit bins into 3-bit ones so slightly different shades of a colour still overlap
+    coarse = counts.reshape((len(counts), 8, 2, 8, 2, 8, 2)).sum(axis=(2, 4, 6)).reshape((len(counts), -1))
+    roots = np.sqrt(coarse / np.maximum(coarse.sum(axis=1, keepdims=True), 1))
+    return roots @ roots.T
+
+
+# Function to pick the most mutually coherent candidates
+def _select_coherent(similarity, num_images):
+    """Greedily grows a set from the candidate most similar to all others, adding whichever candidate
+    is on average most similar to those already chosen."""
+    chosen = [int(np.argmax(similarity.sum(axis=1)))]
+    while len(chosen) < min(num_images, len(similarity)):
+        affinity = similarity[:, chosen].mean(axis=1)
+        affinity[chosen] = -np.inf
+        chosen.append(int(np.argmax(affinity)))
+    return chosen
+
+
+# Function to build a mood board whose images share a colour story
+def harmonised_board(client, theme, num_images=5, candidate_factor=CANDIDATE_FACTOR):
+    """Fetches a larger candidate set, ranks it by palette coherence and returns the most coherent images.
+
+    Returns a dict with the board's image URLs, the unified palette, each chosen image's compact
+    palette and per-stage timings in seconds.
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    hits = client.search_theme(theme, num_images * candidate_factor)
+    timings["search"] = time.perf_counter() - start
+    if not hits:
+        return {"urls": [], "palette": [], "coherence": 0.0, "image_palettes": [], "timings": timings}
+
+    # Colour analysis only needs tiny images, so use Pixabay's small previews rather than the board images
+    step = time.perf_counter()
+    preview_urls = [hit.get("previewURL") or hit["webformatURL"] for hit in hits]
+    thumbnails = dict(fetch_thumbnails(client.session, preview_urls, size=ANALYSIS_SIZE, workers=16))
+    candidates = [(hit, np.asarray(thumbnails[url])) for hit, url in zip(hits, preview_urls) if url in thumbnails]
+    timings["thumbnails"] = time.perf_counter() - step
+    if not candidates:
+        return {"urls": [], "palette": [], "coherence": 0.0, "image_palettes": [], "timings": timings}
+
+    # One vectorised pass bins every candidate; ranking then works on the histograms alone
+    step = time.perf_counter()
+    counts, bin_colors = batched_histograms([image for _, image in candidates], ANALYSIS_BITS)
+    similarity = _similarity_matrix(counts)
+    chosen = _select_coherent(similarity, num_images)
+
+    # The unified palette comes from the chosen images only, so rejected outliers don't pull it around
+    combined = counts[chosen].sum(axis=0)
+    occupied = combined > 0
+    palette = cluster_colors(bin_colors[occupied], combined[occupied].astype(np.float64), BOARD_PALETTE_SIZE)
+
+    # Compact per-image palettes: each chosen image's most populated bins
+    top_bins = np.argsort(counts[chosen], axis=1)[:, ::-1][:, :BOARD_PALETTE_SIZE]
+    image_palettes = [
+        [np.rint(bin_colors[b]).astype(int).tolist() for b in row if counts[i, b] > 0]
+        for i, row in zip(chosen, top_bins)
+    ]
+    timings["palettes"] = time.perf_counter() - step
+
+    timings["total"] = time.perf_counter() - start
+    if timings["total"] > LATENCY_BUDGET_SECONDS:
+        print(f"Harmonised board over budget: {timings['total']:.2f}s > {LATENCY_BUDGET_SECONDS}s", timings)
+
+    return {
+        "urls": [candidates[i][0]["webformatURL"] for i in chosen],
+        "palette": np.rint(palette).astype(int).tolist(),
+        "coherence": round(float(similarity[np.ix_(chosen, chosen)].mean()), 3),
+        "image_palettes": image_palettes,
+        "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()},
+    }
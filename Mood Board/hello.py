@@ -2,6 +2,10 @@ import os
 import gradio as gr
 import requests
 from dotenv import load_dotenv
+from collage import render_collage
+from harmonised_board import harmonised_board
+from pixabay_client import PixabayClient
+from search_cache import SearchCache
 
 # Load API keys from .env file
 load_dotenv()
@@ -10,23 +14,49 @@ pixabay_api_key = os.getenv("PIXABAY_API_KEY")
 if not pixabay_api_key:
     raise ValueError("Pixabay API key not found. Please set PIXABAY_API_KEY in your .env file.")
 
+# Repeated themes are served from a persistent cache instead of spending API quota
+search_cache = SearchCache(os.path.join(os.path.dirname(os.path.abspath(__file__)), "pixabay_cache.sqlite3"))
+
+# One pooled client shared by every request, so boards reuse open connections
+pixabay_client = PixabayClient(pixabay_api_key, cache=search_cache)
+
 # Function to fetch images from Pixabay
 def fetch_images(query, num_images=5):
-    """Fetch images from Pixabay based on the query."""
-    url = f"https://pixabay.com/api/?key={pixabay_api_key}&q={query}&image_type=photo&per_page={num_images}"
-    response = requests.get(url)
-    data = response.json()
+    """Fetch images from Pixabay based on the query; comma-separated keywords are searched concurrently."""
+    try:
+        hits = pixabay_client.search_theme(query, int(num_images))
+    except requests.RequestException as e:
+        return f"Error fetching images: {str(e)}"
+    print("Pixabay search cache:", search_cache.stats())  # Hit/miss counters for monitoring
 
-    if "hits" not in data or not data["hits"]:
+    if not hits:
         return "No images found for the given keyword."
 
-    return [img["webformatURL"] for img in data["hits"]]
+    return [img["webformatURL"] for img in hits]
+
+# Function to fetch images that share a colour story
+def fetch_harmonised_images(query, num_images=5):
+    """Fetch a larger candidate set and keep the images whose palettes fit together best."""
+    try:
+        board = harmonised_board(pixabay_client, query, int(num_images))
+    except requests.RequestException as e:
+        return f"Error fetching images: {str(e)}", None
+
+    if not board["urls"]:
+        return "No images found for the given keyword.", None
+
+    return board["urls"], board
 
 # Gradio interface function
-def mood_board_generator(query, num_images):
-    """Fetches images from Pixabay based on user input."""
-    image_urls = fetch_images(query, num_images)
-    return image_urls
+def mood_board_generator(query, num_images, make_collage, harmonise):
+    """Fetches images from Pixabay based on user input, optionally harmonising their colours and composing them into one collage image."""
+    if harmonise:
+        image_urls, board_info = fetch_harmonised_images(query, num_images)
+    else:
+        image_urls, board_info = fetch_images(query, num_images), None
+    if not make_collage or isinstance(image_urls, str):
+        return image_urls, None, board_info
+    return image_urls, render_collage(pixabay_client.session, image_urls), board_info
 
 # Gradio UI
 iface = gr.Interface(
@@ -34,10 +64,16 @@ iface = gr.Interface(
     inputs=[
         gr.Textbox(label="Enter a Theme or Keyword"),
         gr.Slider(1, 10, value=5, step=1, label="Number of Images"),
+        gr.Checkbox(label="Render a shareable collage", value=False),
+        gr.Checkbox(label="Harmonise colours across images", value=False),
+    ],
+    outputs=[
+        gr.Gallery(label="Fetched Images"),
+        gr.Image(label="Mood Board Collage", type="pil"),
+        gr.JSON(label="Board Palette and Timings"),
     ],
-    outputs=gr.Gallery(label="Fetched Images"),
     title="Mood Board Generator",
-    description="Enter a theme (e.g., 'Beach Vibes', 'Minimal Aesthetic') and generate a mood board with images.",
+    description="Enter a theme (e.g., 'Beach Vibes', 'Minimal Aesthetic') or several comma-separated keywords (e.g., 'beach, minimal, pastel') and generate a mood board with images.",
 )
 
 iface.launch(share=True)  # Set `share=True` to create a public link
@@ -0,0 +1,94 @@
+import asyncio
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+PIXABAY_API_URL = "https://pixabay.com/api/"
+
+# Pixabay rejects per_page values outside this range
+MIN_PER_PAGE, MAX_PER_PAGE = 3, 200
+
+
+# Function to split a theme like "beach, minimal, pastel" into keywords
+def split_keywords(theme):
+    """Returns the non-empty comma-separated keywords of a theme, without duplicates."""
+    keywords = []
+    for keyword in theme.split(","):
+        keyword = " ".join(keyword.split())
+        if keyword and keyword.lower() not in (k.lower() for k in keywords):
+            keywords.append(keyword)
+    return keywords
+
+
+# Function to merge several hit lists into one board
+def interleave_hits(hit_lists, limit):
+    """Takes hits round-robin from each list so every keyword is represented, skipping duplicate image ids."""
+    merged, seen = [], set()
+    for rank in range(max((len(hits) for hits in hit_lists), default=0)):
+        for hits in hit_lists:
+            if rank < len(hits) and hits[rank].get("id") not in seen:
+                seen.add(hits[rank].get("id"))
+                merged.append(hits[rank])
+                if len(merged) == limit:
+                    return merged
+    return merged
+
+
+class PixabayClient:
+    """Pixabay search client sharing one pooled keep-alive session, with timeouts and bounded retries.
+
+    `base_url` can point at a local stub server for testing. With a `cache` (see search_cache.SearchCache),
+    each keyword search is answered from it when possible and stored after a fetch.
+    """
+
+    def __init__(self, api_key, base_url=PIXABAY_API_URL, timeout=(3.05, 10), retries=3, backoff_factor=0.5,
+                 pool_size=10, cache=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,  # Sleeps 0.5s, 1s, 2s ... between attempts
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def search(self, query, per_page=5):
+        """Returns the list of Pixabay hits for one query."""
+        if self.cache is not None:
+            hits = self.cache.get(query, per_page)
+            if hits is not None:
+                return hits
+
+        fetch_count = min(max(int(per_page), MIN_PER_PAGE), MAX_PER_PAGE)
+        params = {"key": self.api_key, "q": query, "image_type": "photo", "per_page": fetch_count}
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        hits = response.json().get("hits", [])
+
+        if self.cache is not None:
+            self.cache.put(query, fetch_count, hits)
+        return hits[:per_page]
+
+    async def search_many(self, queries, per_page=5):
+        """Runs several searches concurrently on the shared session and returns their hit lists in order."""
+        return await asyncio.gather(*(asyncio.to_thread(self.search, query, per_page) for query in queries))
+
+    def search_theme(self, theme, num_images=5):
+        """Searches every comma-separated keyword of a theme concurrently and merges the hits into one board."""
+        keywords = split_keywords(theme)
+        if not keywords:
+            return []
+        if len(keywords) == 1:
+            return self.search(keywords[0], num_images)
+        hit_lists = asyncio.run(self.search_many(keywords, num_images))
+        return interleave_hits(hit_lists, num_images)
+
+    def close(self):
+        self.session.close()
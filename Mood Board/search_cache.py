@@ -0,0 +1,98 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+# Function to normalise a search query into a cache key
+def normalize_query(query):
+    """Lower-cases a query and collapses whitespace, so 'Beach  Vibes' and 'beach vibes' share an entry."""
+    return ", ".join(" ".join(part.lower().split()) for part in query.split(",") if part.strip())
+
+
+class SearchCache:
+    """SQLite-backed TTL cache of search hits, evicting least recently used entries beyond `max_bytes`.
+
+    An entry stored for per_page=N also answers any request for N or fewer images.
+    """
+
+    def __init__(self, path="pixabay_cache.sqlite3", ttl=6 * 60 * 60, max_bytes=20 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS searches (
+                    query TEXT PRIMARY KEY,
+                    per_page INTEGER NOT NULL,
+                    hits TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS searches_accessed ON searches (accessed)")
+
+    def get(self, query, per_page):
+        """Returns up to `per_page` cached hits, or None when there is no fresh entry large enough."""
+        key, now = normalize_query(query), time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT hits FROM searches WHERE query = ? AND per_page >= ? AND created > ?",
+                (key, per_page, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._db:
+                self._db.execute("UPDATE searches SET accessed = ? WHERE query = ?", (now, key))
+        return json.loads(row[0])[:per_page]
+
+    def put(self, query, per_page, hits):
+        """Stores the hits fetched for `per_page` images, replacing any smaller or expired entry."""
+        key, now = normalize_query(query), time.time()
+        payload = json.dumps(hits)
+        with self._lock, self._db:
+            self._db.execute(
+                """INSERT INTO searches (query, per_page, hits, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(query) DO UPDATE SET
+                       per_page = excluded.per_page, hits = excluded.hits, size = excluded.size,
+                       created = excluded.created, accessed = excluded.accessed
+                   WHERE searches.per_page <= excluded.per_page OR searches.created <= ?""",
+                (key, per_page, payload, len(payload), now, now, now - self.ttl),
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        """Drops expired entries, then the least recently used ones until the cache fits in `max_bytes`."""
+        self._db.execute("DELETE FROM searches WHERE created <= ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM searches").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evict = []
+        for query, size in self._db.execute("SELECT query, size FROM searches ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            evict.append((query,))
+            total -= size
+        self._db.executemany("DELETE FROM searches WHERE query = ?", evict)
+
+    def stats(self):
+        """Returns hit/miss counters and the current entry count and size."""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM searches").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import cv2
+from threadpoolctl import threadpool_limits
+from palette_engine import ENGINES, extract_palette, extract_palette_tiled
+
+# File extensions picked up when walking a directory
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+
+
+# Function to list the images to process
+def find_images(source=None, manifest=None, extensions=IMAGE_EXTENSIONS):
+    """Yields image paths from a manifest (one path per line) or by walking a directory in sorted order."""
+    if manifest:
+        with open(manifest) as file:
+            for line in file:
+                path = line.strip()
+                if path and not path.startswith("#"):
+                    yield path
+        return
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in extensions:
+                yield os.path.join(root, name)
+
+
+# Function to read the paths an earlier run already finished
+def completed_paths(output_path):
+    """Returns the paths with a successful result in an existing JSON Lines file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A crash can leave the last line half-written
+            if "palette" in record:
+                done.add(record["path"])
+    return done
+
+
+# Function to limit each worker to one BLAS/OpenMP thread
+def _init_worker():
+    """Stops every worker process from also spawning a thread per core."""
+    threadpool_limits(1)
+
+
+# Function to extract the palette of one image inside a worker process
+def process_image(path, num_colors, engine, max_memory_mb=None):
+    """Decodes and clusters one image, returning a JSON-serialisable result record."""
+    if max_memory_mb:
+        # Tiled mode streams strips into a histogram and never holds a float copy of the image
+        try:
+            palette = extract_palette_tiled(path, num_colors, max_memory_mb=max_memory_mb)
+        except Exception as e:
+            return {"path": path, "error": str(e)}
+        return {"path": path, "palette": palette}
+
+    image = cv2.imread(path)  # BGR, as extract_palette expects
+    if image is None:
+        return {"path": path, "error": "Could not decode image."}
+    try:
+        palette = extract_palette(image, num_colors, engine=engine)
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+    return {"path": path, "width": image.shape[1], "height": image.shape[0], "palette": palette}
+
+
+# Function to run the whole batch
+def run_batch(paths, output_path, num_colors=5, engine="histogram", workers=None, resume=False, max_memory_mb=None):
+    """Clusters images across a process pool and appends each result to `output_path` as soon as it completes."""
+    workers = workers or os.cpu_count() or 1
+    done = completed_paths(output_path) if resume else set()
+    pending = (path for path in paths if path not in done)
+    counts = {"ok": 0, "error": 0, "skipped": len(done)}
+    start = time.perf_counter()
+
+    mode = "a" if resume else "w"
+    if resume and os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+        # Make sure a half-written last line doesn't swallow the next record
+        with open(output_path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            needs_newline = file.read(1) != b"\n"
+    else:
+        needs_newline = False
+
+    with open(output_path, mode) as output, ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        if needs_newline:
+            output.write("\n")
+        in_flight = set()
+        # Keep a bounded number of images queued so huge directories don't pile up in memory
+        max_in_flight = workers * 4
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < max_in_flight:
+                path = next(pending, None)
+                if path is None:
+                    exhausted = True
+                else:
+                    in_flight.add(pool.submit(process_image, path, num_colors, engine, max_memory_mb))
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                output.write(json.dumps(record) + "\n")
+                output.flush()  # Every written line is a resume point
+                counts["error" if "error" in record else "ok"] += 1
+
+    counts["seconds"] = round(time.perf_counter() - start, 2)
+    return counts
+
+
+# Command-line entry point
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract color palettes for a directory or manifest of images.")
+    parser.add_argument("source", nargs="?", help="Directory to walk for images")
+    parser.add_argument("--manifest", help="Text file with one image path per line (instead of a directory)")
+    parser.add_argument("--output", default="palettes.jsonl", help="JSON Lines file to write results to")
+    parser.add_argument("--num-colors", type=int, default=5, help="Number of colors per palette")
+    parser.add_argument("--engine", choices=ENGINES, default="histogram", help="Clustering engine")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument("--resume", action="store_true", help="Append to --output, skipping images it already has")
+    parser.add_argument("--max-memory-mb", type=int,
+                        help="Use bounded-memory tiled extraction with this per-worker ceiling (also reads .npy arrays)")
+    args = parser.parse_args(argv)
+
+    if not args.source and not args.manifest:
+        parser.error("Provide a directory or --manifest.")
+
+    extensions = IMAGE_EXTENSIONS | {".npy"} if args.max_memory_mb else IMAGE_EXTENSIONS
+    paths = find_images(args.source, args.manifest, extensions)
+    counts = run_batch(paths, args.output, args.num_colors, args.engine, args.workers, args.resume, args.max_memory_mb)
+    print(
+        f"{counts['ok']} palettes, {counts['error']} errors, {counts['skipped']} skipped "
+        f"in {counts['seconds']}s -> {args.output}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,12 @@ import os
 import gradio as gr
 import google.generativeai as genai
 import json
-import cv2
+import tempfile
 import numpy as np
 import plotly.graph_objects as go
-from sklearn.cluster import KMeans
 from dotenv import load_dotenv
+from palette_engine import ENGINES, PALETTE_SIZES, PaletteCache, extract_palettes, image_key
+from video_palette import extract_video_palettes
 
 # Load environment variables from .env file
 load_dotenv()
@@ -29,40 +30,57 @@ model = genai.GenerativeModel(
     }
 )
 
-# Function to extract dominant colors from an image
-def extract_palette(image, num_colors=5):
-    """Extracts the dominant colors from an image using KMeans clustering."""
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)  # Convert BGR to RGB
-    image = image.reshape((-1, 3))  # Flatten the image
-    kmeans = KMeans(n_clusters=num_colors, n_init=10, max_iter=300, random_state=42)
-    kmeans.fit(image)
-    colors = kmeans.cluster_centers_.astype(int)
-    return colors.tolist()
+# Palettes keyed by image content, so moving the slider on the same image skips clustering
+palette_cache = PaletteCache(max_bytes=8 * 1024 * 1024)
+
+# Function to fetch a palette from the cache, clustering every slider size on a miss
+def get_palette(image, num_colors, engine):
+    """Returns the palette for `num_colors`, filling the cache for all slider sizes in one pass."""
+    key = image_key(image, engine=engine)
+    palette = palette_cache.get(f"{key}:{num_colors}")
+    if palette is not None:
+        return palette
+
+    # The exact engine has no shared pre-clustering, so only pay for the size that was asked for
+    sizes = [num_colors] if engine == "exact" else PALETTE_SIZES
+    palettes = extract_palettes(image, sizes, engine=engine)
+    for size, result in palettes.items():
+        palette_cache.put(f"{key}:{size}", result)
+    return palettes[num_colors]
 
 # Function to create an image-based color palette visualization
 def create_palette_image(palette):
-    """Generates a color palette image and saves it."""
+    """Generates a color palette image as an in-memory RGB array."""
     height, width = 100, len(palette) * 100  # Define image size
     palette_image = np.zeros((height, width, 3), dtype=np.uint8)
 
     for i, color in enumerate(palette):
         palette_image[:, i * 100:(i + 1) * 100] = color  # Fill each color block
 
-    file_path = "palette_output.png"
-    cv2.imwrite(file_path, cv2.cvtColor(palette_image, cv2.COLOR_RGB2BGR))  # Convert back to BGR for OpenCV saving
-    return file_path
+    return palette_image  # Gradio renders RGB arrays directly, no PNG round-trip needed
+
+# Function to build the palette JSON payload
+def palette_payload(palette):
+    """Returns the extracted color palette as a JSON-serialisable dict."""
+    return {"palette": palette}
 
 # Function to save palette as a downloadable JSON file
 def save_palette(palette):
-    """Saves the extracted color palette as a JSON file."""
-    file_path = "color_palette.json"
-    with open(file_path, "w") as file:
-        json.dump({"palette": palette}, file, indent=4)
-    return file_path
+    """Saves the extracted color palette to a unique temporary JSON file and returns its path."""
+    with tempfile.NamedTemporaryFile("w", prefix="color_palette_", suffix=".json", delete=False) as file:
+        json.dump(palette_payload(palette), file, indent=4)
+    return file.name
+
+# Function to write the shown palette to a file only when the user asks to download it
+def download_palette(payload):
+    """Returns a JSON file path for the palette currently displayed, or None if there is none yet."""
+    if not payload or "palette" not in payload:
+        return None
+    return save_palette(payload["palette"])
 
 # Gradio interface
-def gradio_interface(image, num_colors):
-    """Handles user input and generates the color palette and JSON file."""
+def gradio_interface(image, num_colors, engine):
+    """Handles user input and returns the palette image and JSON payload, both in memory."""
     if image is None:
         return "Please upload an image.", None
 
@@ -70,25 +88,59 @@ def gradio_interface(image, num_colors):
     if not isinstance(image, np.ndarray):
         return "Invalid image format.", None
 
-    palette = extract_palette(image, num_colors)
-    palette_image_path = create_palette_image(palette)
-    report_path = save_palette(palette)
-    
-    return palette_image_path, report_path
+    palette = get_palette(image, int(num_colors), engine)
+    return create_palette_image(palette), palette_payload(palette)
+
+# Gradio interface for video clips
+def gradio_video_interface(video_path, num_colors, sample_seconds):
+    """Streams the uploaded clip and returns the overall palette image and the per-scene timeline."""
+    if not video_path:
+        return None, {"error": "Please upload a video."}
+
+    try:
+        palette, timeline = extract_video_palettes(video_path, int(num_colors), sample_seconds=sample_seconds)
+    except ValueError as e:
+        return None, {"error": str(e)}
+    return create_palette_image(palette), {"palette": palette, "scenes": timeline}
 
 # Gradio UI
-iface = gr.Interface(
-    fn=gradio_interface,
+# Blocks instead of Interface so the JSON file is only written when the download button is clicked
+with gr.Blocks(title="Image Palette Generator") as image_iface:
+    gr.Markdown("# Image Palette Generator\nUpload an image and select the number of dominant colors to extract a color palette.")
+    with gr.Row():
+        with gr.Column():
+            image_input = gr.Image(label="Upload an Image", type="numpy")  # Ensures image is received as a NumPy array
+            num_colors_input = gr.Slider(3, 10, value=5, step=1, label="Number of Colors")
+            engine_input = gr.Radio(list(ENGINES), value="histogram", label="Engine (exact is slowest, histogram closely matches it, sample is fastest but lossy)")
+            extract_button = gr.Button("Extract Palette", variant="primary")
+        with gr.Column():
+            palette_image_output = gr.Image(label="Extracted Color Palette")  # Now displaying image directly in UI
+            palette_json_output = gr.JSON(label="Palette JSON")
+            download_button = gr.Button("Download Palette JSON")
+            palette_file_output = gr.File(label="Download Palette JSON")
+
+    extract_button.click(
+        gradio_interface,
+        inputs=[image_input, num_colors_input, engine_input],
+        outputs=[palette_image_output, palette_json_output],
+    )
+    download_button.click(download_palette, inputs=palette_json_output, outputs=palette_file_output)
+
+video_iface = gr.Interface(
+    fn=gradio_video_interface,
     inputs=[
-        gr.Image(label="Upload an Image", type="numpy"),  # Ensures image is received as a NumPy array
-        gr.Slider(3, 10, value=5, step=1, label="Number of Colors")
+        gr.Video(label="Upload a Video"),
+        gr.Slider(3, 10, value=5, step=1, label="Number of Colors"),
+        gr.Slider(0.1, 5, value=0.5, step=0.1, label="Seconds Between Sampled Frames")
     ],
     outputs=[
-        gr.Image(label="Extracted Color Palette"),  # Now displaying image directly in UI
-        gr.File(label="Download Palette JSON")
+        gr.Image(label="Overall Color Palette"),
+        gr.JSON(label="Palette and Scene Timeline")
     ],
-    title="Image Palette Generator",
-    description="Upload an image and select the number of dominant colors to extract a color palette."
+    title="Video Palette Generator",
+    description="Upload a clip to extract an overall palette plus a palette for every detected scene."
 )
 
+iface = gr.TabbedInterface([image_iface, video_iface], ["Image", "Video"])
+
 iface.launch(share=True)  # Set `share=True` to create a public link
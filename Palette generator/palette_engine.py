@@ -0,0 +1,472 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import cv2
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+# Available clustering engines, from most accurate to fastest:
+#   - "exact":     KMeans over every pixel (the reference result, seconds on large photos)
+#   - "histogram": KMeans over a colour-quantised histogram weighted by pixel counts
+#   - "sample":    mini-batch KMeans over a stratified subset of the pixels. A lossy approximation:
+#                  it can land several ΔE away from the exact result (5.3 at k=5 on the 4K test image)
+ENGINES = ("exact", "histogram", "sample")
+# Largest mean ΔE vs the exact engine for an engine to count as equivalent; "sample" makes no such claim
+MAX_DELTA_E = {"histogram": 2.0}
+
+# Accuracy-vs-speed knobs for the fast engines.
+# HISTOGRAM_BITS: bits kept per channel. 5 bits (32768 bins) stays within ~1-2 ΔE of the
+#   exact result; 4 bits shrinks the histogram 8x but drifts further on smooth gradients.
+# HISTOGRAM_MAX_PIXELS: pixels fed into the histogram. Larger images are stratified down to
+#   this many first; the bin weights barely move, so this mostly trades away decode-sized work.
+# SAMPLE_SIZE: pixels clustered by the sample engine. Larger samples converge on the exact
+#   result, smaller ones are faster but noisier on images with small accent colours.
+HISTOGRAM_BITS = 5
+HISTOGRAM_MAX_PIXELS = 2_000_000
+SAMPLE_SIZE = 50_000
+
+# Default peak working-memory ceiling for tiled extraction, the bytes each pixel of a strip
+# costs while it is being binned (the uint8 strip, its intp bin index and the float64 weights
+# np.bincount builds per channel, plus temporaries) and the headroom kept for clustering.
+TILED_MEMORY_MB = 64
+TILED_BYTES_PER_PIXEL = 32
+TILED_OVERHEAD_MB = 4
+
+# Palette sizes offered by the UI slider, all derived from one shared pre-clustering
+PALETTE_SIZES = range(3, 11)
+# Number of clusters in the shared pre-clustering; comfortably above the largest palette size
+PRECLUSTER_SIZE = 32
+
+
+# Function to map an (N, 3) pixel array to histogram bin numbers
+def _bin_index(pixels, bits):
+    """Quantises pixels to `bits` per channel and returns each pixel's bin as an intp array."""
+    # 5 bits per channel still fits a 15-bit index, and uint16 arithmetic is much faster here
+    index_type = np.uint16 if bits <= 5 else np.uint32
+    quantised = pixels >> (8 - bits)
+    index = (
+        (quantised[:, 0].astype(index_type) << (2 * bits))
+        | (quantised[:, 1].astype(index_type) << bits)
+        | quantised[:, 2]
+    )
+    del quantised
+    return index.astype(np.intp)  # np.bincount converts to intp anyway; do it once, not four times
+
+
+# Function to add an (N, 3) pixel array to running histogram totals
+def _accumulate_histogram(pixels, bits, counts, sums):
+    """Quantises pixels to `bits` per channel and adds their bin counts and colour sums in place."""
+    index = _bin_index(pixels, bits)
+    counts += np.bincount(index, minlength=len(counts))
+    for c in range(3):
+        sums[:, c] += np.bincount(index, weights=pixels[:, c], minlength=len(counts))
+
+
+class ColorHistogram:
+    """Fixed-size running colour histogram that can be fed pixels incrementally and clustered at any point."""
+
+    def __init__(self, bits=HISTOGRAM_BITS):
+        self.bits = bits
+        n_bins = 1 << (3 * bits)
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.sums = np.zeros((n_bins, 3))
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + self.sums.nbytes
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def add(self, pixels):
+        """Adds an (N, 3) uint8 pixel array."""
+        _accumulate_histogram(pixels, self.bits, self.counts, self.sums)
+
+    def merge(self, other):
+        """Adds another histogram with the same bit depth."""
+        self.counts += other.counts
+        self.sums += other.sums
+
+    def reset(self):
+        self.counts[:] = 0
+        self.sums[:] = 0
+
+    def weighted_colors(self):
+        """Returns the mean colour and pixel count of every occupied bin."""
+        occupied = self.counts > 0
+        return self.sums[occupied] / self.counts[occupied, None], self.counts[occupied].astype(np.float64)
+
+    def palette(self, num_colors):
+        """Clusters the histogram into an RGB palette (pixels are added in BGR order)."""
+        colors = cluster_colors(*self.weighted_colors(), num_colors)
+        return np.rint(colors[:, ::-1]).astype(int).tolist()
+
+
+# Function to build a weighted colour histogram of an (N, 3) pixel array
+def color_histogram(pixels, bits=HISTOGRAM_BITS):
+    """Quantises pixels to `bits` per channel and returns the mean colour and pixel count of every occupied bin."""
+    histogram = ColorHistogram(bits)
+    histogram.add(pixels)
+    return histogram.weighted_colors()
+
+
+# Function to bin many small images in one vectorised pass
+def batched_histograms(images, bits=4):
+    """Histograms a list of (H, W, 3) uint8 images together.
+
+    Returns (counts, colors): counts is an (n_images, n_bins) array of pixel counts per image and
+    colors is the (n_bins, 3) mean colour of every bin across all images, in the images' channel order.
+    """
+    n_bins = 1 << (3 * bits)
+    pixels = np.concatenate([image.reshape((-1, 3)) for image in images])
+    image_ids = np.repeat(np.arange(len(images), dtype=np.intp), [image.shape[0] * image.shape[1] for image in images])
+    index = _bin_index(pixels, bits)
+
+    counts = np.bincount(image_ids * n_bins + index, minlength=len(images) * n_bins).reshape((len(images), n_bins))
+    sums = np.stack([np.bincount(index, weights=pixels[:, c], minlength=n_bins) for c in range(3)], axis=1)
+    totals = counts.sum(axis=0)
+    colors = sums / np.maximum(totals, 1)[:, None]
+    return counts, colors
+
+
+# Function to cluster weighted colours into a palette
+def cluster_colors(colors, weights, num_colors, n_init=4):
+    """Runs weighted KMeans over a small set of colours and returns the cluster centres."""
+    num_colors = min(num_colors, len(colors))
+    kmeans = KMeans(n_clusters=num_colors, n_init=n_init, max_iter=300, random_state=42)
+    kmeans.fit(colors, sample_weight=weights)
+    return kmeans.cluster_centers_
+
+
+# Function to pick an evenly spread subset of pixels
+def stratified_sample(pixels, sample_size=SAMPLE_SIZE, seed=42):
+    """Takes one pixel per stride so the sample covers the whole image rather than a random clump."""
+    if len(pixels) <= sample_size:
+        return pixels
+    step = len(pixels) // sample_size
+    offset = np.random.default_rng(seed).integers(step)
+    return pixels[offset::step]
+
+
+# Function to extract dominant colors from an image
+def extract_palette(image, num_colors=5, engine="exact", bits=HISTOGRAM_BITS, sample_size=SAMPLE_SIZE,
+                    max_histogram_pixels=HISTOGRAM_MAX_PIXELS):
+    """Extracts the dominant colors from a BGR image using the selected clustering engine (see ENGINES).
+
+    "histogram" stays within MAX_DELTA_E of "exact"; "sample" is a lossy approximation and may differ visibly.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown palette engine '{engine}'. Choose one of: {', '.join(ENGINES)}.")
+
+    if engine == "exact":
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)  # Convert BGR to RGB
+        image = image.reshape((-1, 3))  # Flatten the image
+        kmeans = KMeans(n_clusters=num_colors, n_init=10, max_iter=300, random_state=42)
+        kmeans.fit(image)
+        colors = kmeans.cluster_centers_
+    else:
+        # The fast engines cluster in BGR order and flip the centres at the end, which
+        # avoids converting (and copying) the whole image up front.
+        pixels = image.reshape((-1, 3))
+        if engine == "histogram":
+            pixels = stratified_sample(pixels, max_histogram_pixels)
+            colors = cluster_colors(*color_histogram(pixels, bits), num_colors)
+        else:
+            sample = stratified_sample(pixels, sample_size).astype(np.float32)
+            kmeans = MiniBatchKMeans(n_clusters=num_colors, n_init=3, batch_size=4096, random_state=42)
+            kmeans.fit(sample)
+            colors = kmeans.cluster_centers_
+        colors = colors[:, ::-1]
+
+    return np.rint(colors).astype(int).tolist()
+
+
+# Function to collect the weighted colours the fast engines cluster
+def _weighted_colors(image, engine, bits, sample_size, max_histogram_pixels):
+    """Returns BGR (colours, weights) for the histogram or sample engine."""
+    pixels = image.reshape((-1, 3))
+    if engine == "histogram":
+        return color_histogram(stratified_sample(pixels, max_histogram_pixels), bits)
+    sample = stratified_sample(pixels, sample_size).astype(np.float64)
+    return sample, np.ones(len(sample))
+
+
+# Function to merge clusters bottom-up with Ward's criterion
+def _ward_merge(centers, weights, sizes):
+    """Merges the closest weighted centres until each requested size is reached; returns {size: centres}."""
+    centers, weights = [c for c in centers], list(weights)
+    # Sizes at or above the number of centres simply get every centre
+    results = {size: np.array(centers) for size in sizes if size >= len(centers)}
+    while True:
+        if len(centers) in sizes:
+            results[len(centers)] = np.array(centers)
+        if len(centers) <= min(sizes):
+            return results
+        best = None
+        for i in range(len(centers)):
+            for j in range(i + 1, len(centers)):
+                cost = weights[i] * weights[j] / (weights[i] + weights[j]) * np.sum((centers[i] - centers[j]) ** 2)
+                if best is None or cost < best[0]:
+                    best = (cost, i, j)
+        _, i, j = best
+        total = weights[i] + weights[j]
+        centers[i] = (centers[i] * weights[i] + centers[j] * weights[j]) / total
+        weights[i] = total
+        del centers[j], weights[j]
+
+
+# Function to refine seeded centres against weighted points
+def _refine(points, weights, centers, iterations=10):
+    """Runs a few weighted Lloyd iterations starting from the given centres."""
+    for _ in range(iterations):
+        # ||c||^2 - 2 p.c ranks centres the same as the full squared distance, without an (N, k, 3) temporary
+        labels = np.argmin((centers ** 2).sum(axis=1) - 2 * points @ centers.T, axis=1)
+        mass = np.bincount(labels, weights=weights, minlength=len(centers))
+        updated = centers.copy()
+        for c in range(3):
+            totals = np.bincount(labels, weights=weights * points[:, c], minlength=len(centers))
+            updated[mass > 0, c] = totals[mass > 0] / mass[mass > 0]
+        if np.allclose(updated, centers):
+            break
+        centers = updated
+    return centers
+
+
+# Function to extract several palette sizes at once
+def extract_palettes(image, sizes=PALETTE_SIZES, engine="histogram", bits=HISTOGRAM_BITS, sample_size=SAMPLE_SIZE,
+                     max_histogram_pixels=HISTOGRAM_MAX_PIXELS):
+    """Returns {num_colors: palette} for every requested size; images with fewer distinct colours get shorter palettes.
+
+    The fast engines over-cluster once into PRECLUSTER_SIZE colours, merge those hierarchically
+    down to each size and polish every level with a few weighted KMeans steps, so all sizes cost
+    about as much as one. The exact engine has no shared pass and clusters each size separately.
+    """
+    sizes = sorted(set(int(size) for size in sizes))
+    if engine == "exact":
+        return {size: extract_palette(image, size, engine="exact") for size in sizes}
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown palette engine '{engine}'. Choose one of: {', '.join(ENGINES)}.")
+
+    colors, weights = _weighted_colors(image, engine, bits, sample_size, max_histogram_pixels)
+    # Flat images have only a few distinct colours; more clusters than that would just be copies
+    distinct = len(np.unique(colors, axis=0))
+    kmeans = KMeans(n_clusters=min(PRECLUSTER_SIZE, distinct), n_init=1, max_iter=300, random_state=42)
+    labels = kmeans.fit_predict(colors, sample_weight=weights)
+    cluster_weights = np.bincount(labels, weights=weights, minlength=kmeans.n_clusters)
+    occupied = cluster_weights > 0  # Empty clusters would make the Ward cost 0/0
+
+    merged = _ward_merge(kmeans.cluster_centers_[occupied], cluster_weights[occupied], sizes)
+    palettes = {}
+    for size in sizes:
+        centers = np.rint(_refine(colors, weights, merged[size])).astype(int)
+        # Like the histogram engine, return fewer colours rather than duplicate swatches
+        _, first = np.unique(centers, axis=0, return_index=True)
+        palettes[size] = centers[np.sort(first), ::-1].tolist()
+    return palettes
+
+
+# Function to derive a content-addressed cache key for an image
+def image_key(image, **params):
+    """Hashes the decoded pixel buffer, its shape and the extraction parameters."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((image.shape, str(image.dtype), sorted(params.items()))).encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+class PaletteCache:
+    """Thread-safe LRU cache of palettes, bounded by the approximate bytes of the stored values."""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = len(key) + len(json.dumps(value))
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted
+
+
+# Function to stream an image as horizontal strips
+def iter_strips(source, max_pixels):
+    """Yields (rows, width, 3) uint8 strips of at most `max_pixels` from an array or image file.
+
+    .npy files are read strip by strip into one reused buffer, so the full image is never resident.
+    Other image files have to be decoded by OpenCV first; the strips then bound only the working memory.
+    """
+    if isinstance(source, (str, os.PathLike)) and os.fspath(source).endswith(".npy"):
+        with open(source, "rb") as file:
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if len(shape) != 3 or shape[2] != 3 or dtype != np.uint8 or fortran_order:
+                raise ValueError(f"Expected a C-ordered (height, width, 3) uint8 array, got {shape} {dtype}.")
+            height, width = shape[:2]
+            rows = max(1, max_pixels // width)
+            buffer = np.empty((rows, width, 3), dtype=np.uint8)
+            for y in range(0, height, rows):
+                strip = buffer[: min(rows, height - y)]
+                file.readinto(memoryview(strip).cast("B"))
+                yield strip
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        image = cv2.imread(os.fspath(source))
+        if image is None:
+            raise ValueError(f"Could not decode image: {source}")
+        source = image
+    rows = max(1, max_pixels // source.shape[1])
+    for y in range(0, source.shape[0], rows):
+        yield source[y:y + rows]
+
+
+# Function to extract a palette from a very large image in bounded memory
+def extract_palette_tiled(source, num_colors=5, bits=HISTOGRAM_BITS, max_memory_mb=TILED_MEMORY_MB):
+    """Histogram-engine palette over every pixel, processed in strips sized to stay under `max_memory_mb`.
+
+    `source` is a BGR array (including np.memmap) or a path to an image or .npy file.
+    """
+    histogram = ColorHistogram(bits)
+    budget = (max_memory_mb - TILED_OVERHEAD_MB) * 1024 * 1024 - histogram.nbytes
+    max_pixels = max(1, budget // TILED_BYTES_PER_PIXEL)
+
+    for strip in iter_strips(source, max_pixels):
+        histogram.add(strip.reshape((-1, 3)))
+    return histogram.palette(num_colors)
+
+
+# Function to compare two palettes perceptually
+def palette_delta_e(palette_a, palette_b):
+    """Returns the mean CIE76 ΔE between two RGB palettes after optimally pairing their colours."""
+    def to_lab(palette):
+        rgb = np.asarray(palette, dtype=np.float32).reshape((1, -1, 3)) / 255.0
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2LAB).reshape((-1, 3))
+
+    lab_a, lab_b = to_lab(palette_a), to_lab(palette_b)
+    distances = np.linalg.norm(lab_a[:, None, :] - lab_b[None, :, :], axis=2)
+    rows, cols = linear_sum_assignment(distances)
+    return float(distances[rows, cols].mean())
+
+
+# Function to build a reproducible test image
+def synthetic_image(height=2160, width=3840, seed=0):
+    """Creates a noisy BGR image made of colour blocks and a gradient, roughly like a product photo."""
+    rng = np.random.default_rng(seed)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    block_colors = rng.integers(0, 256, size=(6, 3))
+    block_width = width // len(block_colors)
+    for i, color in enumerate(block_colors):
+        image[:, i * block_width:(i + 1) * block_width] = color
+    gradient = np.linspace(0, 255, width, dtype=np.uint8)
+    image[: height // 4, :, 0] = gradient
+    noise = rng.integers(-12, 13, size=image.shape, dtype=np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+# Function to read this process's memory counters from /proc
+def _proc_memory_kb(field):
+    """Returns a field such as VmRSS or VmHWM from /proc/self/status, in KiB."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+# Function to measure tiled extraction against its memory ceiling
+def benchmark_tiled(max_memory_mb=TILED_MEMORY_MB, height=10000, width=10000):
+    """Writes a 100 MP image to a .npy file, extracts it tiled and checks peak RSS growth stays under the ceiling.
+
+    Linux only: the RSS high-water mark is reset through /proc/self/clear_refs before the run.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.npy")
+        image = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(height, width, 3))
+        tile = synthetic_image(1000, width)
+        for y in range(0, height, len(tile)):
+            image[y:y + len(tile)] = tile[: height - y]
+        image.flush()
+        del image, tile
+
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")  # Resets VmHWM to the current RSS
+        baseline = _proc_memory_kb("VmRSS")
+        start = time.perf_counter()
+        palette = extract_palette_tiled(path, 5, max_memory_mb=max_memory_mb)
+        elapsed = time.perf_counter() - start
+        growth_mb = (_proc_memory_kb("VmHWM") - baseline) / 1024
+
+    print(f"tiled {width}x{height}: {elapsed:.2f} s, peak RSS growth {growth_mb:.1f} MB "
+          f"(ceiling {max_memory_mb} MB) -> {palette}")
+    return growth_mb <= max_memory_mb
+
+
+# Compare the fast engines against the exact result, exiting non-zero if one exceeds MAX_DELTA_E:
+#   python palette_engine.py [image_path]
+# Check tiled extraction stays under its memory ceiling: python palette_engine.py --tiled [max_memory_mb]
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--tiled":
+        within = benchmark_tiled(int(sys.argv[2]) if len(sys.argv) > 2 else TILED_MEMORY_MB)
+        sys.exit(0 if within else 1)
+
+    image = cv2.imread(sys.argv[1]) if len(sys.argv) > 1 else synthetic_image()
+    if image is None:
+        raise SystemExit(f"Could not read image: {sys.argv[1]}")
+
+    print(f"Image: {image.shape[1]}x{image.shape[0]}")
+    failures = []
+    for num_colors in (5, 8):
+        results = {}
+        for engine in ENGINES:
+            start = time.perf_counter()
+            results[engine] = extract_palette(image, num_colors, engine=engine)
+            elapsed = (time.perf_counter() - start) * 1000
+            delta = palette_delta_e(results["exact"], results[engine])
+            bound = MAX_DELTA_E.get(engine)
+            if bound is None:
+                verdict = "" if engine == "exact" else "(lossy, not checked)"
+            elif delta <= bound:
+                verdict = f"(<= {bound})"
+            else:
+                verdict = f"FAIL (> {bound})"
+                failures.append(f"k={num_colors} {engine}")
+            print(f"k={num_colors:<2} {engine:<10} {elapsed:8.1f} ms   mean ΔE vs exact: {delta:5.2f} {verdict}".rstrip())
+
+    start = time.perf_counter()
+    palettes = extract_palettes(image, engine="histogram")
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"all sizes {min(palettes)}-{max(palettes)} (histogram, one pass): {elapsed:.1f} ms")
+    for num_colors, palette in palettes.items():
+        delta = palette_delta_e(extract_palette(image, num_colors, engine="histogram"), palette)
+        print(f"k={num_colors:<2} shared pass mean ΔE vs per-size histogram: {delta:5.2f}")
+
+    if failures:
+        raise SystemExit(f"Exceeded the ΔE bound vs exact: {', '.join(failures)}")
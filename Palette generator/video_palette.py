@@ -0,0 +1,96 @@
+import sys
+import cv2
+import numpy as np
+from palette_engine import HISTOGRAM_BITS, ColorHistogram
+
+# Seconds between sampled frames; frames in between are grabbed but never decoded to pixels
+VIDEO_SAMPLE_SECONDS = 0.5
+# Sampled frames are downscaled to at most this many pixels before they are binned
+VIDEO_FRAME_PIXELS = 160_000
+# Total-variation distance (0-1) between coarse frame histograms that starts a new scene
+SCENE_CHANGE_THRESHOLD = 0.35
+
+
+# Function to shrink a frame before it is binned
+def _downscale(frame, max_pixels=VIDEO_FRAME_PIXELS):
+    """Resizes a frame with area interpolation so it has at most `max_pixels` pixels."""
+    height, width = frame.shape[:2]
+    scale = (max_pixels / (height * width)) ** 0.5
+    if scale >= 1:
+        return frame
+    return cv2.resize(frame, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+
+# Function to summarise a frame for scene-change detection
+def _frame_signature(frame):
+    """Returns a normalised 3-bit-per-channel colour histogram of a small thumbnail of the frame."""
+    thumbnail = cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA).reshape((-1, 3)) >> 5
+    index = (thumbnail[:, 0].astype(np.intp) << 6) | (thumbnail[:, 1].astype(np.intp) << 3) | thumbnail[:, 2]
+    counts = np.bincount(index, minlength=512)
+    return counts / counts.sum()
+
+
+# Function to extract an overall palette and a per-scene timeline from a video
+def extract_video_palettes(path, num_colors=5, sample_seconds=VIDEO_SAMPLE_SECONDS,
+                           scene_threshold=SCENE_CHANGE_THRESHOLD, keyframes_only=False, bits=HISTOGRAM_BITS):
+    """Streams a video with OpenCV and returns (overall_palette, timeline).
+
+    Frames are sampled every `sample_seconds`; a sampled frame whose colours differ from the
+    previous one by more than `scene_threshold` starts a new scene (None disables scene splits).
+    With `keyframes_only`, only the first sampled frame of each scene is binned.
+    Each scene feeds a fixed-size ColorHistogram, so memory does not grow with clip length;
+    the timeline holds one entry per scene: {"start": s, "end": s, "palette": [...]}
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+
+    fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+    step = max(1, round(fps * sample_seconds))
+    overall, scene = ColorHistogram(bits), ColorHistogram(bits)
+    timeline = []
+    scene_start = 0.0
+    previous_signature = None
+    frame_index = 0
+
+    def close_scene(end):
+        if scene.total:
+            timeline.append({"start": round(scene_start, 3), "end": round(end, 3), "palette": scene.palette(num_colors)})
+            overall.merge(scene)
+            scene.reset()
+
+    try:
+        while capture.grab():
+            if frame_index % step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                timestamp = frame_index / fps
+                signature = _frame_signature(frame)
+                new_scene = (
+                    scene_threshold is not None
+                    and previous_signature is not None
+                    and 0.5 * np.abs(signature - previous_signature).sum() > scene_threshold
+                )
+                if new_scene:
+                    close_scene(timestamp)
+                    scene_start = timestamp
+                if not keyframes_only or new_scene or previous_signature is None:
+                    scene.add(_downscale(frame).reshape((-1, 3)))
+                previous_signature = signature
+            frame_index += 1
+    finally:
+        capture.release()
+
+    close_scene(frame_index / fps)
+    if not overall.total:
+        raise ValueError(f"No frames could be decoded from: {path}")
+    return overall.palette(num_colors), timeline
+
+
+# Print the palettes of a clip: python video_palette.py path/to/clip.mp4 [num_colors]
+if __name__ == "__main__":
+    palette, scenes = extract_video_palettes(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5)
+    print("overall:", palette)
+    for entry in scenes:
+        print(f"{entry['start']:8.2f}-{entry['end']:8.2f}s", entry["palette"])
@@ -1,9 +1,14 @@
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import gradio as gr
 import plotly.graph_objects as go
 import numpy as np
-import re
 from dotenv import load_dotenv
+from plotly.subplots import make_subplots
+from intent_parser import parse_intent, split_charts
+from downsample import bin_histogram, box_stats, cap_payload, coarsen_heatmap, lttb, xy_trace
+from dataset import AGGREGATIONS, DATASET_EXTENSIONS, SharedDataset, columns_in_prompt
 
 # Load environment variables from .env file
 load_dotenv()
@@ -14,10 +19,156 @@ api_key = os.getenv("GEMINI_API_KEY")
 if not api_key:
     print("API Key not found. You can add it to your .env file if you need external data.")
 
+# X-axis values for each category the intent parser can resolve
+CATEGORY_VALUES = {
+    "States": ["Kerala", "Maharashtra", "Uttar Pradesh", "Tamil Nadu", "West Bengal"],
+    "Months": ["Jan", "Feb", "Mar", "Apr", "May", "Jun"],
+    "Countries": ["USA", "Canada", "India", "Australia", "UK"],
+    "Categories": ["Category 1", "Category 2", "Category 3"],
+}
+
+# Scatter plots over text x values sample at most this many rows
+RAW_SAMPLE_POINTS = 100_000
+# Raw values sent for violin plots, shared between the groups
+VIOLIN_SAMPLE_POINTS = 20_000
+# Lines with more points than this are drawn without markers
+LINE_MARKER_POINTS = 200
+# Box and violin plots draw one trace per group, up to this many groups
+MAX_DISTRIBUTION_GROUPS = 20
+
+
+# Charts of a dashboard built at the same time
+DASHBOARD_WORKERS = 4
+# Charts per dashboard row
+DASHBOARD_COLUMNS = 2
+# Pixel height of one dashboard row
+DASHBOARD_ROW_HEIGHT = 420
+
+
+# Function to take an evenly spaced sample of rows
+def sample_rows(values, limit=RAW_SAMPLE_POINTS):
+    """Returns every n-th element so at most `limit` remain; a strided view, so nothing is copied up front."""
+    step = max(1, -(-len(values) // limit))
+    return np.asarray(values[::step])
+
+
+# Function to find the column a year range should filter on
+def year_column(header):
+    return next((name for name in header if "year" in name.lower()), None)
+
+
+# Function to chart an uploaded dataset
+def dataset_visualization(intent, prompt, data_path, x_column="", value_column="", series_column="", aggregation="sum", shared=None):
+    """
+    Loads only the columns the chart needs, aggregates them with NumPy and plots the result.
+    Columns come from the optional textboxes, otherwise from the prompt (e.g. "mean steps by year and region").
+    Charts of one dashboard pass the same `shared` dataset, so columns and aggregates are reused between them.
+    """
+    shared = shared or SharedDataset(data_path)
+    header = shared.header
+    prompt_value, prompt_keys = columns_in_prompt(prompt, header)
+    value_column = value_column.strip() or prompt_value
+    keys = [x_column.strip()] if x_column.strip() else prompt_keys[:1]
+    series = series_column.strip() or (prompt_keys[1] if len(prompt_keys) > 1 else None)
+    keys += [series] if series and keys else []
+    unknown = [name for name in [value_column, *keys] if name and name not in header]
+    if unknown:
+        return f"Error: Column(s) not found: {', '.join(unknown)}. Available: {', '.join(header)}"
+    if value_column is None and (aggregation != "count" or intent.chart_type in ("Histogram", "Box Plot", "Violin Plot", "Scatter Plot")):
+        return f"Error: Could not tell which column to plot. Name one of: {', '.join(header)}"
+    if not keys and intent.chart_type not in ("Histogram", "Box Plot", "Violin Plot"):
+        return f"Error: Could not tell which column to group by. Say e.g. 'by {header[0]}' or fill in the X column."
+
+    # Only the referenced columns are read; CSVs are converted once and memory-mapped afterwards
+    filter_column = year_column(header) if intent.start_year is not None else None
+    columns = shared.columns([value_column, *keys, filter_column])
+    year_filter, mask = None, None
+    if filter_column and columns[filter_column].labels is None:
+        year_filter = (filter_column, intent.start_year, intent.end_year)
+        mask = shared.year_mask(*year_filter)
+    value = columns[value_column] if value_column else None
+    y_label = f"{aggregation} of {value_column}" if value_column else "count"
+    title = f"{intent.chart_type}: {y_label}" + (f" by {' and '.join(keys)}" if keys else "")
+    fig = go.Figure()
+
+    # Raw-value charts: bin or summarise every row on the server, and only sample what must be drawn raw
+    if intent.chart_type in ("Histogram", "Box Plot", "Violin Plot", "Scatter Plot"):
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(len(value.values))
+        values = np.asarray(value.values[rows], dtype=np.float64)
+        title = f"{intent.chart_type}: {value_column}" + (f" by {keys[0]}" if keys else "")
+        if intent.chart_type == "Histogram":
+            centres, counts, width = bin_histogram(values)
+            fig.add_trace(go.Bar(x=centres, y=counts, width=width, name=value_column))
+            fig.update_layout(xaxis_title=value_column, yaxis_title="Frequency", bargap=0)
+        elif intent.chart_type == "Scatter Plot":
+            key = columns[keys[0]]
+            if key.labels is None:
+                fig.add_trace(xy_trace(key.values[rows], values, mode="markers", name=value_column))
+            else:
+                # Text x values can't be thinned on a grid; fall back to an evenly spaced sample
+                sampled = sample_rows(np.arange(len(rows)))
+                x_values = np.asarray(key.labels, dtype=object)[key.values[rows[sampled]]]
+                fig.add_trace(xy_trace(x_values, values[sampled], mode="markers", name=value_column))
+            fig.update_layout(xaxis_title=keys[0], yaxis_title=value_column)
+            title = f"Scatter Plot: {value_column} against {keys[0]}"
+        else:
+            groups = [(value_column, values)]
+            if keys:
+                codes, labels = columns[keys[0]].values[rows], columns[keys[0]].labels
+                if labels is None:
+                    labels, codes = np.unique(codes, return_inverse=True)
+                    labels = labels.tolist()
+                groups = [(str(label), values[codes == code]) for code, label in list(enumerate(labels))[:MAX_DISTRIBUTION_GROUPS]]
+                fig.update_layout(xaxis_title=keys[0])
+            for name, group_values in groups:
+                if intent.chart_type == "Box Plot":
+                    # Quartiles and fences are computed here, so the browser gets five numbers per box
+                    stats = box_stats(group_values)
+                    if stats:
+                        fig.add_trace(go.Box(name=name, x=[name], **stats))
+                else:
+                    # A violin's density curve needs raw values; send a sample shared out between the groups
+                    fig.add_trace(go.Violin(y=sample_rows(group_values, VIOLIN_SAMPLE_POINTS // len(groups)), name=name, box_visible=True))
+            fig.update_layout(yaxis_title=value_column)
+        fig.update_layout(title=title, template="plotly", showlegend=True)
+        return cap_payload(fig)
+
+    labels, result = shared.aggregate(keys, value_column, aggregation, year_filter)
+    x_values = labels[0]
+    if intent.chart_type == "Heatmap":
+        if len(keys) < 2:
+            return "Error: A heatmap needs two columns to group by, e.g. 'by year and region'."
+        heat_x, heat_y, z = coarsen_heatmap(x_values, labels[1], result.T, aggregation)
+        fig.add_trace(go.Heatmap(x=heat_x, y=heat_y, z=z, colorscale="YlGnBu", colorbar=dict(title=y_label)))
+        fig.update_layout(xaxis_title=keys[0], yaxis_title=keys[1])
+    elif intent.chart_type == "Pie Chart":
+        totals = np.nansum(result, axis=1) if result.ndim == 2 else result
+        fig.add_trace(go.Pie(labels=x_values, values=totals, hole=0.3))
+    else:
+        # One trace per series value, or a single trace when grouping by one column
+        traces = [(str(name), result[:, i]) for i, name in enumerate(labels[1])] if len(keys) > 1 else [(y_label, result)]
+        x_values = np.asarray(x_values)
+        # Long numeric x axes (timestamps, ids) are reduced once on the total, so every series keeps the same x
+        rows = lttb(x_values, np.nansum(result, axis=1) if result.ndim == 2 else result) if x_values.dtype.kind in "iuf" else None
+        for name, y_values in traces:
+            if intent.chart_type == "Bar Chart":
+                # Every category keeps its bar; only the payload cap below may thin them
+                fig.add_trace(go.Bar(x=x_values, y=y_values, name=name))
+            elif intent.chart_type == "Area Chart":
+                # Several series stack on top of each other; a single one fills down to zero
+                stacked = dict(stackgroup="series") if len(traces) > 1 else dict(fill="tozeroy")
+                fig.add_trace(xy_trace(x_values, y_values, mode="lines", rows=rows, name=name, **stacked))
+            else:
+                fig.add_trace(xy_trace(x_values, y_values, mode="lines+markers" if len(x_values) <= LINE_MARKER_POINTS else "lines", rows=rows, name=name))
+        fig.update_layout(xaxis_title=keys[0], yaxis_title=y_label)
+    fig.update_layout(title=title, template="plotly", showlegend=True)
+    return cap_payload(fig)
+
 # Function to generate interactive visualizations using Plotly
-def generate_visualizations(prompt):
+def generate_visualizations(prompt, data_file=None, x_column="", value_column="", series_column="", aggregation="sum", shared=None):
     """
-    Generates interactive plots based on the provided prompt.
+    Generates interactive plots based on the provided prompt, from an uploaded dataset when one is given
+    and from random example data otherwise.
     """
     try:
         # Default values
@@ -28,60 +179,25 @@ def generate_visualizations(prompt):
         y_label = "Y Axis"
         color = 'blue'
 
-        # Step 1: Parse the prompt for the chart type and data specifics
-        if "bar chart" in prompt.lower():
-            chart_type = 'Bar Chart'
-        elif "line chart" in prompt.lower():
-            chart_type = 'Line Chart'
-        elif "scatter plot" in prompt.lower():
-            chart_type = 'Scatter Plot'
-        elif "pie chart" in prompt.lower():
-            chart_type = 'Pie Chart'
-        elif "box plot" in prompt.lower():
-            chart_type = 'Box Plot'
-        elif "histogram" in prompt.lower():
-            chart_type = 'Histogram'
-        elif "heatmap" in prompt.lower():
-            chart_type = 'Heatmap'
-        elif "area chart" in prompt.lower():
-            chart_type = 'Area Chart'
-        elif "violin plot" in prompt.lower():
-            chart_type = 'Violin Plot'
-        else:
+        # Steps 1-4: Resolve chart type, data domain, year range and x-axis categories in one pass
+        intent = parse_intent(prompt)
+        if intent.chart_type is None:
             return "Error: Could not detect a valid chart type in the prompt."
-
-        # Step 2: Identify data domain and axis labels
+        chart_type = intent.chart_type
+        if data_file:
+            # Gradio hands over a file path (or an object with .name in older versions)
+            data_path = getattr(data_file, "name", data_file)
+            return dataset_visualization(intent, prompt, data_path, x_column or "", value_column or "", series_column or "", aggregation or "sum", shared)
         # Example: Rainfall data, Sales, Temperature, etc.
-        if "rainfall" in prompt.lower():
-            data_domain = "Rainfall"
-        elif "sales" in prompt.lower():
-            data_domain = "Sales"
-        elif "temperature" in prompt.lower():
-            data_domain = "Temperature"
-        else:
-            data_domain = "General Data"
+        data_domain = intent.domain or "General Data"
 
-        # Step 3: Extract year range and x-axis categories (e.g., states, months)
-        range_match = re.search(r"from (\d{4}) to (\d{4})", prompt)
-        if range_match:
-            start_year, end_year = int(range_match.group(1)), int(range_match.group(2))
-            y_data = list(range(start_year, end_year + 1))
-        else:
+        if intent.start_year is None:
             return "Error: Could not detect valid year range for data."
+        y_data = list(range(intent.start_year, intent.end_year + 1))
 
-        # Step 4: Extract X-axis categories (e.g., states, months, etc.)
-        if "states" in prompt.lower():
-            x_data = ["Kerala", "Maharashtra", "Uttar Pradesh", "Tamil Nadu", "West Bengal"]
-            x_label = "States"
-        elif "months" in prompt.lower():
-            x_data = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
-            x_label = "Months"
-        elif "countries" in prompt.lower():
-            x_data = ["USA", "Canada", "India", "Australia", "UK"]
-            x_label = "Countries"
-        else:
-            x_data = ["Category 1", "Category 2", "Category 3"]
-            x_label = "Categories"
+        # X-axis categories (e.g., states, months, etc.)
+        x_label = intent.category or "Categories"
+        x_data = CATEGORY_VALUES[x_label]
 
         # Step 5: Generate random data for the specified domain (e.g., rainfall, sales, etc.)
         if data_domain == "Rainfall":
@@ -135,25 +251,106 @@ def generate_visualizations(prompt):
             fig.update_layout(title="Violin Plot", yaxis_title=y_label)
 
         fig.update_layout(template="plotly", showlegend=True)
-        return fig
+        return cap_payload(fig)
 
     except Exception as e:
         return f"Error: {str(e)}"
 
+# Function to lay several figures out as one dashboard
+def compose_dashboard(titles, figures):
+    """
+    Places each figure in its own cell of a subplot grid; a chart that failed shows its error message instead.
+    """
+    cols = min(DASHBOARD_COLUMNS, len(figures))
+    rows = -(-len(figures) // cols)
+    # Pie charts need a "domain" cell, everything else shares x/y axes
+    specs = [[None] * cols for _ in range(rows)]
+    for i, fig in enumerate(figures):
+        is_pie = not isinstance(fig, str) and any(trace.type == "pie" for trace in fig.data)
+        specs[i // cols][i % cols] = {"type": "domain" if is_pie else "xy"}
+    dashboard = make_subplots(rows=rows, cols=cols, specs=specs, subplot_titles=titles, vertical_spacing=0.3 / rows)
+
+    for i, (title, fig) in enumerate(zip(titles, figures)):
+        row, col = i // cols + 1, i % cols + 1
+        if isinstance(fig, str):
+            dashboard.add_annotation(text=fig, x=0.5, y=0.5, xref="x domain", yref="y domain", showarrow=False, row=row, col=col)
+            continue
+        for trace in fig.data:
+            # Group each chart's legend entries under its title; only the first colorbar is kept
+            trace.update(legendgroup=str(i), legendgrouptitle_text=title)
+            if trace.type == "heatmap" and any(t.type == "heatmap" for t in dashboard.data):
+                trace.update(showscale=False)
+            dashboard.add_trace(trace, row=row, col=col)
+        if specs[row - 1][col - 1]["type"] == "xy":
+            dashboard.update_xaxes(title_text=fig.layout.xaxis.title.text, row=row, col=col)
+            dashboard.update_yaxes(title_text=fig.layout.yaxis.title.text, row=row, col=col)
+    dashboard.update_layout(template="plotly", height=DASHBOARD_ROW_HEIGHT * rows, barmode="group", legend=dict(groupclick="toggleitem"))
+    return cap_payload(dashboard)
+
+
+# Function to build several charts at once from a multi-chart prompt
+def generate_dashboard(prompts, data_file=None, x_column="", value_column="", series_column="", aggregation="sum"):
+    """
+    Builds one chart per prompt in a worker pool and returns (dashboard figure, timing report).
+    `prompts` is a list, or one prompt describing several charts (see split_charts).
+    With a dataset, every chart reads from one SharedDataset, so columns and aggregates are computed once.
+    """
+    start = time.perf_counter()
+    charts = split_charts(prompts)
+    if not charts:
+        return "Error: Could not find any charts in the prompt.", ""
+    shared = None
+    if data_file:
+        try:
+            shared = SharedDataset(getattr(data_file, "name", data_file))
+        except Exception as e:
+            return f"Error: {str(e)}", ""
+
+    def build(chart):
+        chart_start = time.perf_counter()
+        fig = generate_visualizations(chart, data_file, x_column, value_column, series_column, aggregation, shared)
+        return fig, (time.perf_counter() - chart_start) * 1000
+
+    with ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS) as pool:
+        results = list(pool.map(build, charts))
+    figures = [fig for fig, _ in results]
+    titles = [fig.layout.title.text or chart if not isinstance(fig, str) else chart for chart, fig in zip(charts, figures)]
+    dashboard = compose_dashboard(titles, figures)
+
+    total_ms = (time.perf_counter() - start) * 1000
+    lines = [f"{ms:8.1f} ms  {chart}" + ("  (failed)" if isinstance(fig, str) else "") for chart, (fig, ms) in zip(charts, results)]
+    lines.append(f"{total_ms:8.1f} ms  total for {len(charts)} charts (sum of charts {sum(ms for _, ms in results):.1f} ms)")
+    if shared:
+        lines.append(f"Shared filters and aggregates: {shared.computed} computed, {shared.reused} reused")
+    report = "\n".join(lines)
+    print(report)
+    return dashboard, report
+
+
 # Gradio Interface to interact with the user and generate the plot
-def gradio_interface(prompt):
+def gradio_interface(prompt, data_file, x_column, value_column, series_column, aggregation):
     """
     Handles the user input and triggers the appropriate chart generation based on the prompt.
+    A prompt asking for several charts (one per line, separated by ";" or "and a ...") becomes a dashboard.
     """
-    return generate_visualizations(prompt)
+    if len(split_charts(prompt)) > 1:
+        return generate_dashboard(prompt, data_file, x_column, value_column, series_column, aggregation)
+    start = time.perf_counter()
+    fig = generate_visualizations(prompt, data_file, x_column, value_column, series_column, aggregation)
+    return fig, f"{(time.perf_counter() - start) * 1000:8.1f} ms  {prompt}"
 
 # Gradio Interface Setup
 iface = gr.Interface(
     fn=gradio_interface,
     inputs=[
-        gr.Textbox(label="Enter Prompt", placeholder="e.g. Generate a line chart showing sales from 2015-2020")
+        gr.Textbox(label="Enter Prompt", lines=3, placeholder="e.g. Generate a line chart showing sales from 2015-2020\n(one chart per line for a dashboard)"),
+        gr.File(label="Dataset (optional)", file_types=list(DATASET_EXTENSIONS), type="filepath"),
+        gr.Textbox(label="X / group column (optional)", placeholder="e.g. year"),
+        gr.Textbox(label="Value column (optional)", placeholder="e.g. steps"),
+        gr.Textbox(label="Series column (optional)", placeholder="e.g. region"),
+        gr.Dropdown(choices=list(AGGREGATIONS), value="sum", label="Aggregation"),
     ],
-    outputs="plot",  # Output will be a plot
+    outputs=["plot", gr.Textbox(label="Build time")],  # Output will be a plot (a dashboard for several charts)
     live=False,  # Disable live updates, only update when the user clicks 'Submit'
     title="Comprehensive Data Visualization Tool",
     description="Generate a [chart type] to show the relationship between [x-axis data] and [y-axis data], with [optional specifications]."
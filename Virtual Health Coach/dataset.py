@@ -0,0 +1,453 @@
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+# File types the visualizer accepts
+DATASET_EXTENSIONS = (".csv", ".parquet", ".arrow", ".feather", ".ipc")
+AGGREGATIONS = ("sum", "mean", "count", "min", "max")
+# Rows per chunk when converting a CSV into column files
+CSV_CHUNK_ROWS = 200_000
+# Integer keys spanning at most this many values are grouped with bincount instead of a sort
+DENSE_KEY_RANGE = 1_000_000
+
+# A loaded column: `values` is a numeric (often memory-mapped) array; for text columns it holds
+# integer codes into `labels`, and `labels` is None for numeric columns
+Column = namedtuple("Column", ["values", "labels"])
+
+
+# Function to read a dataset's column names without loading it
+def read_header(path):
+    """Returns the column names of a CSV, Parquet or Arrow/Feather file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        with open(path, newline="") as file:
+            return next(csv.reader(file), [])
+    if extension == ".parquet":
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    import pyarrow.feather as feather
+    return feather.read_table(path, memory_map=True).schema.names
+
+
+# Function to load only the referenced columns of a dataset
+def load_columns(path, columns):
+    """Returns {name: Column} for `columns`, memory-mapped where the format allows.
+
+    CSVs are converted once into per-column binary files next to the source (a `.columns` directory) and
+    memory-mapped afterwards; Parquet and Arrow/Feather files are read through pyarrow's memory map.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in DATASET_EXTENSIONS:
+        raise ValueError(f"Unsupported file type {extension!r}; use one of {', '.join(DATASET_EXTENSIONS)}.")
+    columns = list(dict.fromkeys(columns))
+    if extension == ".csv":
+        return _load_csv_columns(path, columns)
+
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Reading Parquet/Arrow files needs the pyarrow package (pip install pyarrow).")
+    if extension == ".parquet":
+        table = pq.read_table(path, columns=columns, memory_map=True)
+    else:
+        table = feather.read_table(path, columns=columns, memory_map=True)
+
+    loaded = {}
+    for name in columns:
+        array = table.column(name)
+        if array.type.num_fields == 0 and (str(array.type).startswith(("int", "uint", "float", "double", "bool"))):
+            # Zero-copy when the column is a single chunk without nulls
+            array = array.combine_chunks() if array.num_chunks != 1 else array.chunk(0)
+            if array.null_count:
+                array = pc.fill_null(array.cast("float64"), float("nan"))
+            loaded[name] = Column(array.to_numpy(zero_copy_only=False), None)
+        else:
+            encoded = pc.dictionary_encode(array.cast("string")).combine_chunks()
+            codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False)
+            loaded[name] = Column(codes, encoded.dictionary.to_pylist())
+    return loaded
+
+
+# Function to locate a CSV's column cache
+def _cache_paths(path):
+    directory = f"{path}.columns"
+    return directory, os.path.join(directory, "meta.json")
+
+
+# Function to load CSV columns through the column cache, converting missing ones first
+def _load_csv_columns(path, columns):
+    directory, meta_path = _cache_paths(path)
+    stat = os.stat(path)
+    source = [stat.st_size, stat.st_mtime_ns]
+    meta = {"source": source, "rows": None, "columns": {}}
+    if os.path.exists(meta_path):
+        with open(meta_path) as file:
+            cached = json.load(file)
+        if cached.get("source") == source:
+            meta = cached  # The CSV hasn't changed since its columns were cached
+
+    missing = [name for name in columns if name not in meta["columns"]]
+    if missing:
+        os.makedirs(directory, exist_ok=True)
+        rows, converted = _convert_csv(path, missing, directory)
+        meta["rows"] = rows
+        meta["columns"].update(converted)
+        # A unique temp name per call, so concurrent requests on the same upload never share a half-written file
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False) as file:
+            json.dump(meta, file)
+        os.replace(file.name, meta_path)
+
+    loaded = {}
+    for name in columns:
+        info = meta["columns"][name]
+        file_path = os.path.join(directory, info["file"])
+        values = np.memmap(file_path, dtype=info["dtype"], mode="r") if meta["rows"] else np.empty(0, info["dtype"])
+        loaded[name] = Column(values, info.get("labels"))
+    return loaded
+
+
+# Function to read a CSV's columns chunk by chunk
+def _csv_chunks(path, columns):
+    """Yields {name: data} chunks: a float64 array for numeric columns, (codes, labels) for text columns.
+
+    A column is numeric when its first chunk parses as numbers; later values that don't parse become NaN.
+    Uses pyarrow's multithreaded streaming reader when it's installed, and the csv module otherwise.
+    """
+    with open(path, newline="") as file:
+        header = next(csv.reader(file), [])
+    unknown = [name for name in columns if name not in header]
+    if unknown:
+        raise ValueError(f"Column(s) not found: {', '.join(unknown)}. Available: {', '.join(header)}")
+
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pacsv
+    except ImportError:
+        pacsv = None
+
+    if pacsv is not None:
+        # Peek at the first block to decide the column kinds. Everything is then read as text, so a later
+        # block can't change a column's kind or fail the read on a stray token ("unknown" in a number column)
+        first = pacsv.open_csv(path, convert_options=pacsv.ConvertOptions(include_columns=columns)).read_next_batch()
+        numeric = {field.name for field in first.schema if pa.types.is_integer(field.type) or pa.types.is_floating(field.type)}
+        reader = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=1 << 24),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=columns,
+                column_types={name: pa.string() for name in columns},
+                strings_can_be_null=True,
+            ),
+        )
+        for batch in reader:
+            chunk = {}
+            for name in columns:
+                array = batch.column(name)
+                if name in numeric:
+                    chunk[name] = _arrow_floats(array, pa, pc)
+                else:
+                    encoded = pc.dictionary_encode(pc.fill_null(array, ""))
+                    chunk[name] = (encoded.indices.to_numpy(zero_copy_only=False), encoded.dictionary.to_pylist())
+            yield chunk
+        return
+
+    indexes = [header.index(name) for name in columns]
+    numeric = None
+    with open(path, newline="") as file:
+        reader = csv.reader(file)
+        next(reader)
+        while True:
+            rows = [row for _, row in zip(range(CSV_CHUNK_ROWS), reader)]
+            if not rows:
+                break
+            raw = {name: np.array([row[index] if index < len(row) else "" for row in rows]) for name, index in zip(columns, indexes)}
+            parsed = {name: _parse_floats(values) for name, values in raw.items()}
+            if numeric is None:
+                numeric = {name for name in columns if parsed[name] is not None}
+            chunk = {}
+            for name in columns:
+                if name in numeric:
+                    chunk[name] = parsed[name] if parsed[name] is not None else np.array([_to_float(value) for value in raw[name]])
+                else:
+                    labels, codes = np.unique(raw[name], return_inverse=True)
+                    chunk[name] = (codes, labels.tolist())
+            yield chunk
+
+
+# Pattern of a number pyarrow can cast to float64 (after trimming whitespace)
+_NUMBER_PATTERN = r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$|^[+-]?(?i:inf|infinity|nan)$"
+
+
+# Function to convert a pyarrow text column to float64, with NaN for blanks and non-numbers
+def _arrow_floats(array, pa, pc):
+    """Casts the whole chunk in one call; only when some value doesn't parse are the non-numbers masked out first."""
+    array = pc.utf8_trim_whitespace(array)
+    try:
+        floats = pc.cast(array, pa.float64())
+    except pa.ArrowInvalid:
+        parses = pc.match_substring_regex(array, _NUMBER_PATTERN)
+        floats = pc.cast(pc.if_else(parses, array, pa.scalar(None, pa.string())), pa.float64())
+    return pc.fill_null(floats, float("nan")).to_numpy(zero_copy_only=False)
+
+
+# Function to parse a chunk of strings as numbers in one vectorised call
+def _parse_floats(raw):
+    """Returns a float64 array (blanks as NaN), or None if any non-blank value isn't a number."""
+    cleaned = np.char.strip(raw.astype(str))
+    cleaned[cleaned == ""] = "nan"
+    try:
+        return cleaned.astype(np.float64)
+    except ValueError:
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+# Function to stream a CSV into per-column binary files
+def _convert_csv(path, columns, directory):
+    """Writes `columns` of a CSV as float64 (numeric) or int32 code (text) files; returns (rows, metadata)."""
+    safe_names = {name: re.sub(r"[^\w.-]", "_", name) for name in columns}
+    outputs, kinds, label_codes = {}, {}, {name: {} for name in columns}
+    rows = 0
+    try:
+        for chunk in _csv_chunks(path, columns):
+            for name, data in chunk.items():
+                if name not in kinds:
+                    kinds[name] = "text" if isinstance(data, tuple) else "numeric"
+                    # Written under a unique temp name and moved into place once complete, so a concurrent
+                    # conversion of the same upload never interleaves with this one or reads a partial file
+                    outputs[name] = tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False)
+                if kinds[name] == "numeric":
+                    values = np.asarray(data, dtype=np.float64)
+                else:
+                    # Map this chunk's labels onto the column-wide code table; only unique labels touch Python
+                    local_codes, local_labels = data
+                    codes = label_codes[name]
+                    remap = np.array([codes.setdefault(label, len(codes)) for label in local_labels], dtype=np.int32)
+                    values = remap[local_codes] if len(remap) else np.empty(0, dtype=np.int32)
+                outputs[name].write(values.tobytes())
+            rows += len(values)
+    except BaseException:
+        for output in outputs.values():
+            output.close()
+            os.remove(output.name)
+        raise
+
+    converted = {}
+    for name in columns:
+        kind = kinds.get(name, "numeric")
+        file_name = f"{safe_names[name]}.{'f8' if kind == 'numeric' else 'i4'}"
+        if name in outputs:
+            outputs[name].close()
+            os.replace(outputs[name].name, os.path.join(directory, file_name))
+        else:
+            open(os.path.join(directory, file_name), "wb").close()  # Header-only CSV
+        converted[name] = {"file": file_name, "dtype": "float64" if kind == "numeric" else "int32"}
+        if kind == "text":
+            converted[name]["labels"] = list(label_codes[name])
+    return rows, converted
+
+
+# Function to turn a column into dense group codes
+def factorize(column):
+    """Returns (codes, labels) with codes in 0..len(labels)-1 (-1 for missing values)."""
+    values, labels = column
+    if labels is not None:
+        return values, labels
+    finite = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(len(values), dtype=bool)
+    present = values[finite]
+    if len(present) and np.array_equal(present, np.round(present)):
+        low, high = int(present.min()), int(present.max())
+        if high - low <= DENSE_KEY_RANGE:
+            # Integer keys such as years: offsetting into a bincount avoids sorting the whole column
+            offsets = np.full(len(values), -1, dtype=np.int64)
+            offsets[finite] = present.astype(np.int64) - low
+            used = np.flatnonzero(np.bincount(offsets[finite], minlength=high - low + 1))
+            remap = np.full(high - low + 1, -1, dtype=np.int64)
+            remap[used] = np.arange(len(used))
+            codes = np.where(offsets >= 0, remap[np.maximum(offsets, 0)], -1)
+            return codes, (used + low).tolist()
+    unique, inverse = np.unique(present, return_inverse=True)
+    codes = np.full(len(values), -1, dtype=np.int64)
+    codes[finite] = inverse
+    return codes, unique.tolist()
+
+
+# Function to aggregate a value column grouped by one or two key columns
+def group_by(keys, value=None, how="sum", mask=None):
+    """Vectorised group-by: returns (labels per key, result array shaped by the keys' label counts).
+
+    `value` may be None for how="count". Rows with a missing key or value, or outside `mask`, are skipped;
+    groups with no rows are NaN (0 for sum and count).
+    """
+    if how not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation {how!r}; use one of {', '.join(AGGREGATIONS)}.")
+    if mask is not None:
+        # Select the rows first, so numeric keys only get labels for values that survive the mask
+        rows = np.flatnonzero(mask)
+        keys = [Column(key.values[rows], key.labels) for key in keys]
+        value = Column(value.values[rows], value.labels) if value is not None else None
+    factorized = [factorize(key) for key in keys]
+    shape = tuple(len(labels) for _, labels in factorized)
+    group = np.zeros(len(factorized[0][0]), dtype=np.int64)
+    valid = np.ones(len(group), dtype=bool)
+    for (codes, labels) in factorized:
+        valid &= codes >= 0
+        group = group * len(labels) + codes
+
+    values = None
+    if value is not None and how != "count":
+        values = np.asarray(value.values, dtype=np.float64)
+        valid &= ~np.isnan(values)
+        values = values[valid]
+    group = group[valid]
+    size = int(np.prod(shape))
+
+    counts = np.bincount(group, minlength=size).astype(np.float64)
+    if how == "count":
+        result = counts
+    elif how in ("sum", "mean"):
+        result = np.bincount(group, weights=values, minlength=size)
+        if how == "mean":
+            result = np.divide(result, counts, out=np.full(size, np.nan), where=counts > 0)
+    else:
+        # Sort once by group, then reduce each contiguous run
+        order = np.argsort(group, kind="stable")
+        sorted_groups, sorted_values = group[order], values[order]
+        starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]) if len(order) else np.empty(0, dtype=np.int64)
+        reduce = np.minimum if how == "min" else np.maximum
+        result = np.full(size, np.nan)
+        if len(starts):
+            result[sorted_groups[starts]] = reduce.reduceat(sorted_values, starts)
+    return [labels for _, labels in factorized], result.reshape(shape)
+
+
+class SharedDataset:
+    """One dataset's loaded columns, year filters and aggregates, shared by the charts of a dashboard.
+
+    Safe to use from several threads: each column is loaded once and each distinct aggregate is computed
+    once, even when two charts ask for it at the same moment. Returned arrays must not be modified.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.header = read_header(path)
+        self.computed = 0
+        self.reused = 0
+        self._columns = {}
+        self._results = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _once(self, key, compute):
+        with self._lock:
+            if key in self._results:
+                self.reused += 1
+                return self._results[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._results:
+                    self.reused += 1  # Another chart finished computing it while we waited
+                    return self._results[key]
+            result = compute()
+            with self._lock:
+                self._results[key] = result
+                self.computed += 1
+        return result
+
+    def columns(self, names):
+        """Returns {name: Column}, loading the ones not loaded yet in a single pass over the file."""
+        names = [name for name in dict.fromkeys(names) if name]
+        with self._load_lock:
+            missing = [name for name in names if name not in self._columns]
+            if missing:
+                self._columns.update(load_columns(self.path, missing))
+        return {name: self._columns[name] for name in names}
+
+    def year_mask(self, column, start, end):
+        """Returns the boolean row mask for start <= column <= end."""
+        def compute():
+            years = self.columns([column])[column].values
+            return (years >= start) & (years <= end)
+        return self._once(("mask", column, start, end), compute)
+
+    def aggregate(self, keys, value=None, how="sum", year_filter=None):
+        """group_by over named columns; `year_filter` is an optional (column, start, end)."""
+        def compute():
+            columns = self.columns([*keys, value])
+            mask = self.year_mask(*year_filter) if year_filter else None
+            return group_by([columns[name] for name in keys], columns[value] if value else None, how, mask)
+        return self._once(("group_by", tuple(keys), value, how, year_filter), compute)
+
+
+# Function to pick the columns a prompt refers to
+def columns_in_prompt(prompt, header):
+    """Returns (value_column, key_columns) mentioned in `prompt`.
+
+    Columns right after "by", "per", "across", "over" or "for each" (or joined to one by "and") are keys;
+    the first other column mentioned is the value.
+    """
+    text = prompt.lower()
+    mentions = []
+    for name in sorted(header, key=len, reverse=True):
+        for match in re.finditer(rf"(?<!\w){re.escape(name.lower())}(?!\w)", text):
+            if not any(start <= match.start() < end for start, end, _ in mentions):
+                mentions.append((match.start(), match.end(), name))
+    mentions.sort()
+
+    keys, value = [], None
+    for start, _, name in mentions:
+        before = text[:start].rstrip()
+        if re.search(r"(?:\bby|\bper|\bacross|\bover|\bfor each)$", before) or (keys and before.endswith(" and")):
+            if name not in keys:
+                keys.append(name)
+        elif value is None:
+            value = name
+    return value, keys[:2]
+
+
+# Convert and aggregate a synthetic log: python dataset.py [rows]
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(0)
+    regions = np.array(["North", "South", "East", "West"])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "steps.csv")
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["year", "region", "steps", "calories", "notes"])
+            for start in range(0, rows, CSV_CHUNK_ROWS):
+                n = min(CSV_CHUNK_ROWS, rows - start)
+                writer.writerows(zip(
+                    rng.integers(2015, 2025, n), regions[rng.integers(0, 4, n)],
+                    rng.integers(1000, 20000, n), np.round(rng.random(n) * 800, 1), ["-"] * n,
+                ))
+        print(f"CSV: {os.path.getsize(path) / 2**20:.1f} MB, {rows:,} rows")
+
+        for attempt in ("first load (converts 3 of 5 columns)", "second load (memory-mapped)"):
+            start = time.perf_counter()
+            loaded = load_columns(path, ["year", "region", "steps"])
+            load_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            labels, result = group_by([loaded["year"], loaded["region"]], loaded["steps"], "mean")
+            group_ms = (time.perf_counter() - start) * 1000
+            print(f"{attempt}: load {load_ms:8.1f} ms, mean steps by year x region {group_ms:6.1f} ms -> {result.shape}")
+        print("Columns cached:", sorted(os.listdir(f"{path}.columns")))
+        print(columns_in_prompt("Line chart of average steps by year and region", ["year", "region", "steps", "calories"]))
@@ -0,0 +1,228 @@
+import sys
+import time
+import numpy as np
+import plotly.graph_objects as go
+
+# Above this many points scatter and line traces are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_POINTS = 10_000
+# Line series longer than this are reduced with LTTB; a couple of points per horizontal pixel looks identical
+LINE_POINTS = 2000
+# Series longer than this many times LINE_POINTS are pre-reduced with min-max buckets before LTTB
+MINMAX_FACTOR = 4
+# Scatter plots keep one point per occupied cell of a grid this many cells per side
+SCATTER_GRID = 200
+# Bins used for server-side histograms
+HISTOGRAM_BINS = 100
+# Heatmaps are coarsened to at most this many columns and rows; 300 x 300 float32 cells are ~480 KB of
+# base64 JSON, well under MAX_FIGURE_BYTES even with long text labels
+HEATMAP_CELLS_PER_SIDE = 300
+# Trace types whose x and y arrays are parallel point lists, so every other point can be dropped
+THINNABLE_TRACES = ("scatter", "scattergl", "bar")
+# Figures whose JSON exceeds this are thinned until they fit
+MAX_FIGURE_BYTES = 2_000_000
+
+
+# Function to pick the extreme points of equal-size buckets
+def min_max(x, y, buckets):
+    """Returns indices of the min and max y of each of `buckets` index-contiguous buckets, in order.
+
+    Keeps every peak and trough, so the outline of a long series survives; `x` is assumed sorted.
+    """
+    n = len(y)
+    if n <= 2 * buckets:
+        return np.arange(n)
+    size = n // buckets
+    body = np.asarray(y[:size * buckets], dtype=np.float64).reshape(buckets, size)
+    starts = np.arange(buckets) * size
+    picked = np.concatenate([starts + np.argmin(body, axis=1), starts + np.argmax(body, axis=1)])
+    if n > size * buckets:
+        tail = np.asarray(y[size * buckets:], dtype=np.float64)
+        picked = np.append(picked, [size * buckets + np.argmin(tail), size * buckets + np.argmax(tail)])
+    return np.unique(np.concatenate([[0, n - 1], picked]))
+
+
+# Function to reduce a line with Largest-Triangle-Three-Buckets
+def lttb(x, y, points=LINE_POINTS):
+    """Returns indices of `points` samples that keep the visual shape of the line (x sorted, numeric).
+
+    Each bucket keeps the point forming the largest triangle with the previously kept point and the
+    average of the next bucket. Very long series are pre-reduced with min_max first.
+    """
+    n = len(y)
+    if n <= points or points < 3:
+        return np.arange(n)
+    candidates = np.arange(n)
+    if n > MINMAX_FACTOR * points:
+        candidates = min_max(x, y, MINMAX_FACTOR * points // 2)
+    cx = np.asarray(x, dtype=np.float64)[candidates]
+    cy = np.asarray(y, dtype=np.float64)[candidates]
+    m = len(candidates)
+    if m <= points:
+        return candidates
+
+    # Buckets between the fixed first and last points
+    edges = np.linspace(1, m - 1, points - 1).astype(np.intp)
+    keep = np.empty(points, dtype=np.intp)
+    keep[0], keep[-1] = 0, m - 1
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else m
+        next_x, next_y = cx[next_start:next_end].mean(), cy[next_start:next_end].mean()
+        # Twice the triangle area; the constant factor doesn't change the argmax
+        area = np.abs((cx[previous] - next_x) * (cy[start:end] - cy[previous]) - (cx[previous] - cx[start:end]) * (next_y - cy[previous]))
+        previous = start + int(np.argmax(area))
+        keep[i + 1] = previous
+    return candidates[keep]
+
+
+# Function to thin a scatter plot to one point per occupied grid cell
+def thin_scatter(x, y, grid=SCATTER_GRID):
+    """Returns indices of at most grid * grid points covering every occupied cell, so outliers and the
+    overall shape survive. One O(n) pass: the last point written into a cell represents it."""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    if len(x) <= grid * grid:
+        return np.arange(len(x))
+    finite = np.isfinite(x) & np.isfinite(y)
+    rows = np.flatnonzero(finite)
+    x, y = x[rows], y[rows]
+    cells = []
+    for values in (x, y):
+        low, span = values.min(), max(np.ptp(values), 1e-12)
+        cells.append(np.minimum(((values - low) / span * grid).astype(np.intp), grid - 1))
+    representative = np.full(grid * grid, -1, dtype=np.intp)
+    representative[cells[0] * grid + cells[1]] = np.arange(len(rows))
+    return rows[np.sort(representative[representative >= 0])]
+
+
+# Function to bin values into a histogram on the server
+def bin_histogram(values, bins=HISTOGRAM_BINS):
+    """Returns (bin centres, counts, bin width) over every finite value."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return np.empty(0), np.empty(0), 1.0
+    counts, edges = np.histogram(values, bins=bins, range=(values.min(), values.max()))
+    return (edges[:-1] + edges[1:]) / 2, counts, edges[1] - edges[0]
+
+
+# Function to summarise a distribution for a precomputed box plot
+def box_stats(values):
+    """Returns the quartiles, Tukey fences and mean of the finite values, so the box needs no raw data."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return dict(q1=[q1], median=[median], q3=[q3], lowerfence=[inside.min()], upperfence=[inside.max()], mean=[values.mean()])
+
+
+# Function to shrink a heatmap grid by merging neighbouring cells
+def coarsen_heatmap(x_labels, y_labels, z, how="mean", cells=HEATMAP_CELLS_PER_SIDE):
+    """Merges blocks of columns/rows until each side has at most `cells`; returns (x_labels, y_labels, z).
+
+    Sums and counts are added up, min and max stay min and max, means are averaged. Each block is
+    labelled by its first member.
+    """
+    for axis, labels in ((1, x_labels), (0, y_labels)):
+        n = z.shape[axis]
+        if n <= cells:
+            continue
+        starts = np.arange(0, n, -(-n // cells))
+        if how in ("sum", "count"):
+            z = np.add.reduceat(np.nan_to_num(z), starts, axis=axis)
+        elif how in ("min", "max"):
+            fill = np.inf if how == "min" else -np.inf
+            reduced = (np.minimum if how == "min" else np.maximum).reduceat(np.where(np.isnan(z), fill, z), starts, axis=axis)
+            z = np.where(np.isinf(reduced), np.nan, reduced)
+        else:
+            totals = np.add.reduceat(np.nan_to_num(z), starts, axis=axis)
+            counts = np.add.reduceat(~np.isnan(z), starts, axis=axis)
+            z = np.divide(totals, counts, out=np.full(totals.shape, np.nan), where=counts > 0)
+        labels = [labels[i] for i in starts]
+        if axis == 1:
+            x_labels = labels
+        else:
+            y_labels = labels
+    return x_labels, y_labels, np.asarray(z, dtype=np.float32)
+
+
+# Function to build a line or scatter trace that stays light with millions of points
+def xy_trace(x, y, mode="lines", rows=None, **kwargs):
+    """Downsamples (LTTB for numeric lines, grid thinning for scatter) and switches to Scattergl when large.
+
+    Pass `rows` to reuse one selection across several series, so stacked series keep the same x values.
+    """
+    x, y = np.asarray(x), np.asarray(y)
+    if rows is None:
+        numeric_x = x.dtype.kind in "iuf"
+        if mode == "markers" and numeric_x:
+            rows = thin_scatter(x, y)
+        elif numeric_x:
+            rows = lttb(x, y)
+        else:
+            rows = np.arange(len(x))
+    x, y = x[rows], y[rows]
+    # float32 halves the y payload; x stays float64 so timestamps keep their precision
+    webgl = len(x) > WEBGL_POINTS and "stackgroup" not in kwargs  # Scattergl can't stack
+    trace = go.Scattergl if webgl else go.Scatter
+    return trace(x=x, y=y.astype(np.float32) if y.dtype.kind == "f" else y, mode=mode, **kwargs)
+
+
+# Function to measure a figure's JSON payload
+def figure_bytes(fig):
+    return len(fig.to_json())
+
+
+# Function to keep a figure under the payload cap
+def cap_payload(fig, max_bytes=MAX_FIGURE_BYTES):
+    """Halves the longest point traces (every other point) until the JSON fits `max_bytes`.
+
+    Only traces whose x and y are parallel point lists are thinned; heatmaps and precomputed boxes are
+    left alone (they're bounded where they are built). Stops once a pass no longer shrinks the payload.
+    """
+    size = figure_bytes(fig)
+    while size > max_bytes:
+        thinnable = [
+            trace for trace in fig.data
+            if trace.type in THINNABLE_TRACES and trace.x is not None and trace.y is not None and len(trace.x) == len(trace.y)
+        ]
+        longest = max((len(trace.x) for trace in thinnable), default=0)
+        if longest < 2:
+            break
+        for trace in thinnable:
+            if len(trace.x) * 2 > longest:
+                trace.update(x=np.asarray(trace.x)[::2], y=np.asarray(trace.y)[::2])
+        previous, size = size, figure_bytes(fig)
+        if size >= previous:
+            break
+    return fig
+
+
+# Benchmark: python downsample.py [points ...]
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    xy_trace(np.arange(10.0), np.arange(10.0))  # Warm up plotly's validators
+    go.Figure(go.Scatter(x=np.arange(10.0), y=np.arange(10.0))).to_json()
+    for n in [int(arg) for arg in sys.argv[1:]] or [10_000, 1_000_000, 10_000_000]:
+        x = np.arange(n, dtype=np.float64)
+        y = np.cumsum(rng.standard_normal(n))
+        builds = [
+            ("line   full SVG", lambda: go.Figure(go.Scatter(x=x, y=y, mode="lines"))),
+            ("line   LTTB", lambda: go.Figure(xy_trace(x, y, "lines"))),
+            ("scatter full SVG", lambda: go.Figure(go.Scatter(x=x, y=y, mode="markers"))),
+            ("scatter thinned", lambda: go.Figure(xy_trace(x, y, "markers"))),
+            ("histogram raw", lambda: go.Figure(go.Histogram(x=y))),
+            ("histogram binned", lambda: go.Figure(go.Bar(dict(zip(("x", "y", "width"), bin_histogram(y)))))),
+        ]
+        for label, build in builds:
+            start = time.perf_counter()
+            fig = build()
+            build_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            payload = figure_bytes(fig)
+            json_ms = (time.perf_counter() - start) * 1000
+            print(f"{n:>10,} points {label:>17} ({fig.data[0].type:>9}): build {build_ms:8.1f} ms, "
+                  f"to_json {json_ms:8.1f} ms, payload {payload / 1024:10.1f} KB")
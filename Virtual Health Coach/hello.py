@@ -1,8 +1,14 @@
 import os
+import sys
 import gradio as gr
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+# Live inputs go through the shared debounce/coalesce layer
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from live_input import LIVE_CONCURRENCY, SUPERSEDED, LiveInput  # noqa: E402
+from profile_cache import cached_guidance, profile_cache  # noqa: E402
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -57,9 +63,29 @@ def generate_health_guidance(fitness_goal, gender, age, daily_activity_level, tr
     except Exception as e:
         return f"Error generating health guidance: {str(e)}"
 
+# Function to serve guidance for a profile, from the shared profile cache when it has it
+def cached_health_guidance(*inputs):
+    """
+    Canonicalises the profile (case, spacing, synonyms, age band) so equivalent profiles share one answer.
+    """
+    return cached_guidance(inputs, generate_health_guidance)
+
+# Function to always ask the model, for users who want fresh advice (the answer still refreshes the cache)
+def fresh_health_guidance(*inputs):
+    return cached_guidance(inputs, generate_health_guidance, bypass=True)
+
+# Debounces keystrokes and reuses identical generations across the live interface
+live_input = LiveInput()
+
 # Set up Gradio interface for user interaction
-def gradio_interface(fitness_goal, gender, age, daily_activity_level, training_frequency, sleep_quality, diet_preference, mental_health_status, stress_level):
-    return generate_health_guidance(fitness_goal, gender, age, daily_activity_level, training_frequency, sleep_quality, diet_preference, mental_health_status, stress_level)
+def gradio_interface(fitness_goal, gender, age, daily_activity_level, training_frequency, sleep_quality, diet_preference, mental_health_status, stress_level, fresh_advice, request: gr.Request):
+    inputs = (fitness_goal, gender, age, daily_activity_level, training_frequency, sleep_quality, diet_preference, mental_health_status, stress_level)
+    result = live_input.submit(request.session_hash, inputs, fresh_health_guidance if fresh_advice else cached_health_guidance)
+    if result is SUPERSEDED:
+        return gr.update()  # Still typing, or a field is empty; keep the current output
+    print("Live input:", live_input.stats(request.session_hash))  # Calls saved this session
+    print("Profile cache:", profile_cache.stats())  # Calls saved across all users
+    return result
 
 # Create a simple Gradio interface
 iface = gr.Interface(
@@ -73,10 +99,12 @@ iface = gr.Interface(
         gr.Textbox(label="Sleep Quality (Good, Fair, Poor)"),
         gr.Textbox(label="Diet Preference (e.g., Vegetarian, Vegan, High-protein, Balanced)"),
         gr.Textbox(label="Mental Health Status (e.g., Stressed, Calm, Anxious)"),
-        gr.Textbox(label="Stress Level (Low, Moderate, High)")
+        gr.Textbox(label="Stress Level (Low, Moderate, High)"),
+        gr.Checkbox(label="Fresh advice (skip the cache of answers for similar profiles)", value=False)
     ],
     outputs="text",  # The generated response will be text
     live=True,
+    concurrency_limit=LIVE_CONCURRENCY,
     title="Virtual Health Coach AI",
     description="Provide your health data, and receive personalized guidance for fitness, nutrition, mental wellness, and overall lifestyle improvement."
 )
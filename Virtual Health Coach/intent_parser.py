@@ -0,0 +1,213 @@
+import re
+import sys
+import time
+from collections import namedtuple
+
+# (slot, value, phrases). Within a slot, earlier rows win when a prompt matches several.
+# Phrases are matched as whole words, case-insensitively, with an optional plural "s".
+INTENT_TABLE = [
+    ("chart_type", "Bar Chart", ("bar chart", "bar graph", "column chart")),
+    ("chart_type", "Line Chart", ("line chart", "line graph", "trend line")),
+    ("chart_type", "Scatter Plot", ("scatter plot", "scatter chart", "scatterplot", "scatter")),
+    ("chart_type", "Pie Chart", ("pie chart", "donut chart", "doughnut chart", "pie")),
+    ("chart_type", "Box Plot", ("box plot", "boxplot", "box and whisker")),
+    ("chart_type", "Histogram", ("histogram", "distribution")),
+    ("chart_type", "Heatmap", ("heatmap", "heat map")),
+    ("chart_type", "Area Chart", ("area chart", "area graph")),
+    ("chart_type", "Violin Plot", ("violin plot", "violin")),
+    ("domain", "Rainfall", ("rainfall", "rain", "precipitation")),
+    ("domain", "Sales", ("sales", "revenue", "units sold")),
+    ("domain", "Temperature", ("temperature", "temp", "weather")),
+    ("category", "States", ("state",)),
+    ("category", "Months", ("month", "monthly")),
+    ("category", "Countries", ("country", "countries", "nation")),
+]
+
+# Year ranges: "from 2015 to 2020", "2015-2020", "2015 – 2020", "between 2015 and 2020", "2015 through 2020";
+# a lone year ("in 2019") is a one-year range
+_YEAR = r"(?:19|20)\d{2}"
+YEAR_RANGE_PATTERN = rf"(?P<start>{_YEAR})\s*(?:-|–|—|to|until|through|and)\s*(?P<end>{_YEAR})\b"
+SINGLE_YEAR_PATTERN = rf"(?P<year>{_YEAR})\b"
+
+Intent = namedtuple("Intent", ["chart_type", "domain", "category", "start_year", "end_year"])
+
+
+# Function to turn phrases into a prefix-factored regular expression
+def _trie_pattern(phrases):
+    """Builds an alternation that shares common prefixes ("bar chart|bar graph" -> "bar (?:chart|graph)"),
+    so the regex engine tests each character once instead of once per phrase."""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char).replace(r"\ ", r"\s+") + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # A phrase ending here makes the rest optional; longer phrases still win because regex is greedy
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+# Function to compile the intent table into one regular expression
+def compile_intents(table=INTENT_TABLE):
+    """Returns (pattern, lookup): one alternation over every phrase and year form, and phrase -> (slot, value, rank)."""
+    lookup = {}
+    for rank, (slot, value, phrases) in enumerate(table):
+        for phrase in phrases:
+            lookup.setdefault(phrase, (slot, value, rank))
+    # Prompts are lower-cased once before matching, which is cheaper than re.IGNORECASE
+    pattern = re.compile(rf"\b(?:(?P<phrase>{_trie_pattern(lookup)})s?\b|{YEAR_RANGE_PATTERN}|{SINGLE_YEAR_PATTERN})")
+    return pattern, lookup
+
+
+_PATTERN, _LOOKUP = compile_intents()
+
+
+# Function to parse a visualisation prompt
+def parse_intent(prompt, pattern=_PATTERN, lookup=_LOOKUP):
+    """Resolves chart type, domain, category and year range from `prompt` in a single regex pass.
+
+    Unmatched slots are None. The first year range wins over single years; a reversed range is reordered.
+    """
+    best = {}
+    years = None
+    single_year = None
+    # findall hands back plain (phrase, start, end, year) tuples, cheaper than building match objects
+    for phrase, start, end, year in pattern.findall(prompt.lower()):
+        if phrase:
+            slot, value, rank = lookup.get(phrase) or lookup[" ".join(phrase.split())]
+            if rank < best.get(slot, (None, float("inf")))[1]:
+                best[slot] = (value, rank)
+        elif start:
+            if years is None:
+                years = sorted((int(start), int(end)))
+        elif single_year is None:
+            single_year = int(year)
+
+    if years is None and single_year is not None:
+        years = (single_year, single_year)
+    start_year, end_year = years if years else (None, None)
+    return Intent(
+        best.get("chart_type", (None,))[0], best.get("domain", (None,))[0], best.get("category", (None,))[0],
+        start_year, end_year,
+    )
+
+
+# Words left dangling between two chart requests ("... by region, and a pie chart ...")
+_CONNECTOR_TAIL = re.compile(r"(?:[\s,.]|\b(?:and|then|plus|also|with|a|an)\b)+$")
+# What must come right before a chart phrase for it to start a new chart: a comma, or "and"/"plus"/"then"
+# followed by an article ("..., a pie chart", "and a pie chart", "then an area chart"); anything else
+# ("sales distribution", "showing the distribution") is part of the current chart's description
+_CHART_SEPARATOR = re.compile(r"(?:,\s*(?:(?:and|then|plus|also)\s+)?(?:(?:a|an)\s+)?|\b(?:and|plus|then)\s+(?:(?:then|also)\s+)?(?:a|an)\s+)$")
+
+
+# Function to split a multi-chart prompt into one prompt per chart
+def split_charts(prompt, pattern=_PATTERN, lookup=_LOOKUP):
+    """Splits `prompt` (or a list of prompts) into one prompt per chart.
+
+    Pieces are separated by new lines or ";". Within a piece, a new chart starts only at a chart phrase
+    introduced by a connector ("a bar chart of steps by region and a pie chart of steps per region"), so
+    "bar chart of sales distribution" stays one chart. Pieces without a year range inherit the first one
+    in the whole prompt.
+    """
+    pieces = prompt if isinstance(prompt, (list, tuple)) else re.split(r"[\n;]+", prompt)
+    charts = []
+    for piece in pieces:
+        lowered = piece.lower()
+        starts = [
+            match.start() for match in pattern.finditer(lowered)
+            if match.group("phrase") and (lookup.get(match.group("phrase")) or lookup[" ".join(match.group("phrase").split())])[0] == "chart_type"
+        ]
+        # The first chart phrase opens the piece; later ones only count after a connector
+        starts = starts[:1] + [start for start in starts[1:] if _CHART_SEPARATOR.search(lowered[:start])]
+        bounds = [0, *starts[1:], len(piece)]
+        for start, end in zip(bounds, bounds[1:]):
+            chart = _CONNECTOR_TAIL.sub("", piece[start:end].strip())
+            if chart:
+                charts.append(chart)
+
+    whole = parse_intent(" ".join(pieces))
+    if whole.start_year is not None:
+        charts = [
+            chart if parse_intent(chart).start_year is not None else f"{chart} from {whole.start_year} to {whole.end_year}"
+            for chart in charts
+        ]
+    return charts
+
+
+# Prompts with their expected intent, used to check coverage and to time the parser
+CORPUS = [
+    ("Generate a line chart showing sales from 2015-2020", Intent("Line Chart", "Sales", None, 2015, 2020)),
+    ("Generate a line chart showing sales from 2015 to 2020", Intent("Line Chart", "Sales", None, 2015, 2020)),
+    ("Bar chart of rainfall across states from 2010 to 2015", Intent("Bar Chart", "Rainfall", "States", 2010, 2015)),
+    ("Show a HEATMAP of temperature by month, 2018 – 2022", Intent("Heatmap", "Temperature", "Months", 2018, 2022)),
+    ("scatter plot of revenue per country between 2001 and 2005", Intent("Scatter Plot", "Sales", "Countries", 2001, 2005)),
+    ("Pie chart of sales by country in 2019", Intent("Pie Chart", "Sales", "Countries", 2019, 2019)),
+    ("Box plot of precipitation across states 2012-2016", Intent("Box Plot", "Rainfall", "States", 2012, 2016)),
+    ("Histogram of temperatures from 2020 to 2015", Intent("Histogram", "Temperature", None, 2015, 2020)),
+    ("Area chart of monthly sales 2015 through 2019", Intent("Area Chart", "Sales", "Months", 2015, 2019)),
+    ("violin plot of rainfall for countries from 1999 to 2004", Intent("Violin Plot", "Rainfall", "Countries", 1999, 2004)),
+    ("Bar graph comparing revenue in different states, 2016-2018", Intent("Bar Chart", "Sales", "States", 2016, 2018)),
+    ("Line graph of weather by month from 2010 until 2012", Intent("Line Chart", "Temperature", "Months", 2010, 2012)),
+    ("Heat map of units sold per nation 2014—2015", Intent("Heatmap", "Sales", "Countries", 2014, 2015)),
+    ("Generate a line chart of statesman salaries from 2015 to 2020", Intent("Line Chart", None, None, 2015, 2020)),
+    ("Plot something nice", Intent(None, None, None, None, None)),
+    ("Donut chart of rain by states from 2000 to 2001", Intent("Pie Chart", "Rainfall", "States", 2000, 2001)),
+    ("Bar chart of sales distribution by region from 2015 to 2020", Intent("Bar Chart", "Sales", None, 2015, 2020)),
+    ("Pie chart of revenue, showing the distribution per country in 2019", Intent("Pie Chart", "Sales", "Countries", 2019, 2019)),
+]
+
+# Multi-chart prompts with the number of charts split_charts should find (every CORPUS prompt is one chart)
+SPLIT_CORPUS = [
+    ("Bar chart of steps by region and a pie chart of steps per region", 2),
+    ("Bar chart of steps by region, pie chart of steps per region, then a histogram of calories", 3),
+    ("Line chart of sales from 2015 to 2020 plus an area chart of sales by month", 2),
+    ("Histogram of steps\nBox plot of steps by region; violin plot of calories", 3),
+    ("Scatter plot of sales and revenue with a trend line", 1),
+]
+
+
+# Function reproducing the original chained if/elif parsing, kept as the benchmark baseline
+def _legacy_parse(prompt):
+    chart_type = next((name for phrase, name in [
+        ("bar chart", "Bar Chart"), ("line chart", "Line Chart"), ("scatter plot", "Scatter Plot"),
+        ("pie chart", "Pie Chart"), ("box plot", "Box Plot"), ("histogram", "Histogram"),
+        ("heatmap", "Heatmap"), ("area chart", "Area Chart"), ("violin plot", "Violin Plot"),
+    ] if phrase in prompt.lower()), None)
+    domain = next((name for phrase, name in [
+        ("rainfall", "Rainfall"), ("sales", "Sales"), ("temperature", "Temperature")
+    ] if phrase in prompt.lower()), None)
+    category = next((name for phrase, name in [
+        ("states", "States"), ("months", "Months"), ("countries", "Countries")
+    ] if phrase in prompt.lower()), None)
+    range_match = re.search(r"from (\d{4}) to (\d{4})", prompt)
+    years = (int(range_match.group(1)), int(range_match.group(2))) if range_match else (None, None)
+    return Intent(chart_type, domain, category, *years)
+
+
+# Check the corpus and time both parsers: python intent_parser.py [repeats]
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    for name, parse in [("legacy", _legacy_parse), ("compiled", parse_intent)]:
+        failures = [(prompt, parse(prompt)) for prompt, expected in CORPUS if parse(prompt) != expected]
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for prompt, _ in CORPUS:
+                parse(prompt)
+        microseconds = (time.perf_counter() - start) / (repeats * len(CORPUS)) * 1e6
+        print(f"{name:>8}: {len(CORPUS) - len(failures)}/{len(CORPUS)} prompts parsed correctly, {microseconds:.1f} µs per parse")
+        if name == "compiled":
+            for prompt, got in failures:
+                print("  MISMATCH:", prompt, got)
+
+    expected_splits = [(prompt, 1) for prompt, _ in CORPUS if parse_intent(prompt).chart_type] + SPLIT_CORPUS
+    split_failures = [(prompt, split_charts(prompt)) for prompt, count in expected_splits if len(split_charts(prompt)) != count]
+    print(f"   split: {len(expected_splits) - len(split_failures)}/{len(expected_splits)} prompts split into the right number of charts")
+    for prompt, got in split_failures:
+        print("  MISMATCH:", prompt, got)
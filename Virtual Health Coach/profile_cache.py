@@ -0,0 +1,242 @@
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Cached guidance is served for this long before the model is asked again
+PROFILE_CACHE_TTL_SECONDS = 6 * 60 * 60
+# Profiles kept in memory; the least recently used one goes first
+PROFILE_CACHE_ENTRIES = 1024
+# Lower bounds of the adult age bands that share guidance (18-24, 25-29, ..., 70+); minors are never banded
+AGE_BANDS = (18, 25, 30, 35, 40, 50, 60, 70)
+
+# Field names in the order generate_health_guidance takes them
+PROFILE_FIELDS = (
+    "fitness_goal", "gender", "age", "daily_activity_level", "training_frequency",
+    "sleep_quality", "diet_preference", "mental_health_status", "stress_level",
+)
+
+# Per field, the canonical value for each way users type it (already lower-cased, single-spaced)
+FIELD_SYNONYMS = {
+    "fitness_goal": {
+        "lose fat": ("lose fat", "fat loss", "lose weight", "weight loss", "burn fat", "get lean", "slim down"),
+        "build muscle": ("build muscle", "gain muscle", "muscle gain", "bulk", "bulking", "hypertrophy", "get stronger", "strength"),
+        "improve endurance": ("improve endurance", "endurance", "stamina", "cardio", "run longer"),
+        "general fitness": ("general fitness", "stay fit", "stay healthy", "maintain", "maintenance", "be healthier"),
+    },
+    "gender": {
+        "male": ("male", "m", "man"),
+        "female": ("female", "f", "woman"),
+        "non-binary": ("non-binary", "non binary", "nonbinary", "nb", "enby"),
+    },
+    "daily_activity_level": {
+        "sedentary": ("sedentary", "inactive", "not active", "desk job", "sitting"),
+        "lightly active": ("lightly active", "light", "slightly active", "a little active"),
+        "moderately active": ("moderately active", "moderate", "active", "fairly active"),
+        "very active": ("very active", "highly active", "extremely active", "athlete"),
+    },
+    "sleep_quality": {
+        "good": ("good", "great", "excellent", "well"),
+        "fair": ("fair", "ok", "okay", "average", "alright", "so-so"),
+        "poor": ("poor", "bad", "terrible", "awful"),
+        "insomnia": ("insomnia", "can't sleep", "cannot sleep"),
+    },
+    "diet_preference": {
+        "vegetarian": ("vegetarian", "veggie", "veg"),
+        "vegan": ("vegan", "plant-based", "plant based"),
+        "high-protein": ("high-protein", "high protein", "protein"),
+        "balanced": ("balanced", "mixed", "normal", "no preference", "anything", "omnivore"),
+        "keto": ("keto", "ketogenic", "low carb", "low-carb"),
+    },
+    "mental_health_status": {
+        "stressed": ("stressed", "stress", "stressed out", "overwhelmed"),
+        "anxious": ("anxious", "anxiety", "nervous", "worried"),
+        "calm": ("calm", "relaxed"),
+        "good": ("good", "happy", "great"),
+        "okay": ("okay", "ok", "fine"),
+        "low mood": ("low mood", "sad", "down", "low"),
+        "depressed": ("depressed", "depression"),
+    },
+    "stress_level": {
+        "low": ("low", "mild", "minimal", "none"),
+        "moderate": ("moderate", "medium", "average", "some"),
+        "high": ("high", "very high", "severe", "extreme"),
+    },
+}
+
+# Number words people type for training days
+NUMBER_WORDS = {"zero": 0, "none": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "daily": 7, "every day": 7}
+
+# {field: {spelling: canonical}}, built once from FIELD_SYNONYMS
+_LOOKUP = {
+    field: {spelling: canonical for canonical, spellings in synonyms.items() for spelling in spellings}
+    for field, synonyms in FIELD_SYNONYMS.items()
+}
+
+
+# Function to normalise free text before matching
+def normalize_text(value):
+    """Lower-cases, collapses whitespace and drops surrounding punctuation ("  Lose FAT. " -> "lose fat")."""
+    return " ".join(str(value).casefold().split()).strip(" .,!;:'\"")
+
+
+# Function to turn an age into its band
+def age_band(value):
+    """Returns the age band ("30-34", "70+") for a typed adult age, the exact age ("12") for a minor, or the
+    normalised text if it has no number."""
+    match = re.search(r"\d+", str(value))
+    if not match:
+        return normalize_text(value)
+    age = int(match.group())
+    if age < AGE_BANDS[0]:
+        return str(age)
+    for low, high in zip(AGE_BANDS, AGE_BANDS[1:]):
+        if age < high:
+            return f"{low}-{high - 1}"
+    return f"{AGE_BANDS[-1]}+"
+
+
+# Function to turn a training frequency into days per week
+def training_days(value):
+    """Reads "3", "3 days", "3x a week" or "three" as "3"; values above 7 are capped at 7."""
+    text = normalize_text(value)
+    match = re.search(r"\d+", text)
+    if match:
+        return str(min(int(match.group()), 7))
+    for word, days in NUMBER_WORDS.items():
+        if re.search(rf"\b{word}\b", text):
+            return str(days)
+    return text
+
+
+# Function to canonicalise a health profile
+def canonical_profile(inputs):
+    """Returns the nine inputs as a tuple of canonical values, used only as the cache key.
+
+    Known spellings map to one value per field, adult ages fall into bands and training frequency becomes
+    a day count; anything unrecognised is kept as normalised text, so it still caches, just on its own.
+    """
+    profile = []
+    for field, value in zip(PROFILE_FIELDS, inputs):
+        if field == "age":
+            profile.append(age_band(value))
+        elif field == "training_frequency":
+            profile.append(training_days(value))
+        else:
+            text = normalize_text(value)
+            profile.append(_LOOKUP[field].get(text, text))
+    return tuple(profile)
+
+
+class ProfileCache:
+    """Thread-safe LRU cache of guidance keyed by canonical profile, with entries expiring after a TTL."""
+
+    def __init__(self, max_entries=PROFILE_CACHE_ENTRIES, ttl_seconds=PROFILE_CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.bypassed = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def skip(self):
+        """Counts a lookup skipped because the user asked for fresh guidance."""
+        with self._lock:
+            self.bypassed += 1
+
+    def stats(self):
+        """Returns hit/miss counts, the hit rate and the number of cached profiles."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits, "misses": self.misses, "expired": self.expired, "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0, "entries": len(self._entries),
+            }
+
+
+profile_cache = ProfileCache()
+
+
+# Function to serve guidance from the cache, generating it on a miss
+def cached_guidance(inputs, generate, bypass=False, cache=profile_cache):
+    """Returns generate(*inputs), reusing the cached answer for the same canonical profile.
+
+    The model always sees the user's own words; canonicalising only decides which answers can be shared.
+
+    With `bypass` the cache isn't read, but the fresh answer replaces the cached one. Answers that
+    `generate` reports as failures ("Sorry, ..." / "Error ...") are never cached.
+    """
+    key = canonical_profile(inputs)
+    if bypass:
+        cache.skip()
+    else:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    result = generate(*inputs)
+    if result and not result.startswith(("Sorry", "Error")):
+        cache.put(key, result)
+    return result
+
+
+# Simulate profile-heavy traffic: python profile_cache.py [requests]
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(0)
+    # A handful of common profiles, each typed several ways, plus a long tail of one-off profiles
+    common = [
+        (["Lose fat", "fat loss", "LOSE  WEIGHT"], ["Female", "f", "woman"], ["30", "32", "34 years"], ["Sedentary", "desk job"],
+         ["3", "3 days", "three"], ["Poor", "bad"], ["Vegetarian", "veggie"], ["Stressed", "stressed out"], ["High", "very high"]),
+        (["Build muscle", "bulk", "gain muscle"], ["Male", "M", "man"], ["25", "27", "29"], ["Moderately active", "active"],
+         ["4", "4x a week", "four"], ["Good", "great"], ["High-protein", "high protein"], ["Calm", "relaxed"], ["Low", "mild"]),
+        (["Improve endurance", "stamina"], ["Female", "F"], ["41", "45"], ["Very active", "highly active"],
+         ["5", "5 days"], ["Fair", "ok"], ["Balanced", "normal"], ["Anxious", "anxiety"], ["Moderate", "medium"]),
+    ]
+    calls = {"exact": 0, "canonical": 0}
+    exact_seen = set()
+    cache = ProfileCache()
+
+    def fake_generate(*profile):
+        calls["canonical"] += 1
+        return f"Guidance for {profile}"
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        if rng.random() < 0.85:
+            inputs = [rng.choice(options) for options in rng.choice(common)]
+        else:
+            inputs = ["Lose fat", "Male", str(rng.randint(18, 80)), "Sedentary", str(rng.randint(1, 7)), "Fair",
+                      f"diet {rng.randint(1, 500)}", "Calm", "Low"]
+        if tuple(inputs) not in exact_seen:
+            exact_seen.add(tuple(inputs))
+            calls["exact"] += 1
+        cached_guidance(inputs, fake_generate, cache=cache)
+    microseconds = (time.perf_counter() - start) / requests * 1e6
+    print(f"{requests} requests: {calls['exact']} model calls keyed on raw inputs, {calls['canonical']} keyed on canonical profiles")
+    print("Cache:", cache.stats(), f"({microseconds:.1f} µs per lookup)")
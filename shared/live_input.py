@@ -0,0 +1,152 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Seconds an input has to stay unchanged before a generation starts
+DEBOUNCE_SECONDS = 0.8
+# The first input needs at least this many characters (and no input may be blank) before anything fires
+MIN_INPUT_CHARS = 3
+# Per-session state is kept for this many of the most recent sessions
+MAX_SESSIONS = 1000
+# Gradio queue concurrency for live interfaces: debouncing only works if newer keystrokes can start
+# while an older one is waiting, so events must not run one at a time
+LIVE_CONCURRENCY = 16
+
+# Returned instead of a result when a call was superseded or skipped; handlers map it to gr.update()
+SUPERSEDED = object()
+
+
+# Function to normalise inputs into a coalescing key
+def normalize_inputs(inputs):
+    """Collapses whitespace and case so "Yoga  workshop" and "yoga workshop" count as the same request."""
+    return tuple(" ".join(str(value).split()).casefold() for value in inputs)
+
+
+class _Session:
+    def __init__(self):
+        self.sequence = 0
+        self.last_key = None
+        self.last_result = None
+        self.counts = {"requested": 0, "generated": 0, "skipped": 0, "debounced": 0, "repeated": 0, "coalesced": 0, "discarded": 0}
+
+
+class LiveInput:
+    """Debounces, de-duplicates and coalesces generations triggered by live=True Gradio inputs.
+
+    Each session's calls are numbered. A call waits `debounce_seconds` and gives up if a newer one arrived
+    meanwhile; an input equal to the session's last one reuses its result; an input that is already being
+    generated (by any session) waits for that generation instead of starting another. A result that comes
+    back after a newer input arrived (even a cleared one) is discarded, so outputs never flicker back.
+    """
+
+    def __init__(self, debounce_seconds=DEBOUNCE_SECONDS, min_chars=MIN_INPUT_CHARS, max_sessions=MAX_SESSIONS):
+        self.debounce_seconds = debounce_seconds
+        self.min_chars = min_chars
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _session(self, session_id):
+        """Returns a session's state, evicting the least recently used session beyond max_sessions."""
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._sessions[session_id] = _Session()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return state
+
+    def ready(self, inputs):
+        """Inputs are worth a generation once none is blank and the first has at least min_chars characters."""
+        values = [str(value).strip() for value in inputs]
+        return all(values) and len(values[0]) >= self.min_chars
+
+    def submit(self, session_id, inputs, generate):
+        """Returns generate(*inputs), a reused result, or SUPERSEDED when this call should not update the UI."""
+        key = (generate, normalize_inputs(inputs))
+        with self._lock:
+            state = self._session(session_id)
+            state.counts["requested"] += 1
+            # Numbered even when skipped, so clearing the field also discards a generation still in flight
+            state.sequence += 1
+            sequence = state.sequence
+            if not self.ready(inputs):
+                state.counts["skipped"] += 1
+                return SUPERSEDED
+
+        time.sleep(self.debounce_seconds)
+
+        with self._lock:
+            if state.sequence != sequence:
+                state.counts["debounced"] += 1
+                return SUPERSEDED
+            if key == state.last_key:
+                state.counts["repeated"] += 1
+                return state.last_result
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                state.counts["generated"] += 1
+            else:
+                state.counts["coalesced"] += 1
+
+        if owner:
+            try:
+                future.set_result(generate(*inputs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+        result = future.result()
+
+        with self._lock:
+            if state.sequence != sequence:
+                # A newer input is already being handled; showing this one now would be a step backwards
+                state.counts["discarded"] += 1
+                return SUPERSEDED
+            state.last_key, state.last_result = key, result
+        return result
+
+    def stats(self, session_id=None):
+        """Returns call counts (and calls saved) for one session, or totals across all tracked sessions."""
+        with self._lock:
+            if session_id is not None:
+                sessions = [self._sessions[session_id]] if session_id in self._sessions else []
+            else:
+                sessions = list(self._sessions.values())
+            counts = {name: sum(state.counts[name] for state in sessions) for name in _Session().counts}
+        counts["calls_saved"] = counts["requested"] - counts["generated"]
+        return counts
+
+
+# Simulate someone typing into a live textbox: python live_input.py [seconds_between_keystrokes]
+if __name__ == "__main__":
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else 0.15
+    live_input = LiveInput()
+
+    def slow_generation(topic):
+        time.sleep(1.5)
+        return f"Calendar for {topic}"
+
+    # Gradio fires one event per keystroke, each on its own worker
+    with ThreadPoolExecutor(max_workers=LIVE_CONCURRENCY) as pool:
+        futures = []
+        text = "Yoga Workshop"
+        for i in range(1, len(text) + 1):
+            futures.append(pool.submit(live_input.submit, "session-a", (text[:i],), slow_generation))
+            time.sleep(interval)
+        # A second user submits the same topic while it is still generating, then the first repeats it
+        time.sleep(0.5)
+        futures.append(pool.submit(live_input.submit, "session-b", ("yoga workshop",), slow_generation))
+        time.sleep(2.5)
+        futures.append(pool.submit(live_input.submit, "session-a", ("Yoga Workshop ",), slow_generation))
+        results = [future.result() for future in futures]
+
+    print("Outputs shown:", [result for result in results if result is not SUPERSEDED])
+    print("session-a:", live_input.stats("session-a"))
+    print("session-b:", live_input.stats("session-b"))